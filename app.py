@@ -1,111 +1,2562 @@
-import pprint
-import pymongo
-import mysql.connector
-import pandas as pd
+import os
+import re
+import importlib
+import json
+import pickle
+import math
+import asyncio
+import time
+import random
+import hashlib
+import functools
+import tempfile
+import sqlite3
+import threading
+from urllib.parse import urlsplit, parse_qsl, urlencode
+import queue
+from collections import deque, OrderedDict
+from itertools import chain
+from contextlib import contextmanager, asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import streamlit as st
-import googleapiclient.discovery
 from googleapiclient.errors import HttpError
 
 
+class LazyModule:
+    """
+        Stand-in for a module that is imported on its first attribute access, so
+        every Streamlit cold start does not pay for modules only some stages use.
+            """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attribute):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+
+httplib2 = LazyModule('httplib2')
+httpx = LazyModule('httpx')
+pymongo = LazyModule('pymongo')
+mysql_connector = LazyModule('mysql.connector')
+mysql_pooling = LazyModule('mysql.connector.pooling')
+pd = LazyModule('pandas')
+discovery = LazyModule('googleapiclient.discovery')
+discovery_cache = LazyModule('googleapiclient.discovery_cache')
+
+# Maximum number of ids accepted by a single videos().list call
+VIDEO_BATCH_SIZE = 50
+# Maximum page size of commentThreads().list and comments().list
+COMMENT_PAGE_SIZE = 100
+# Maximum number of ids accepted by a single channels().list call
+CHANNEL_BATCH_SIZE = 50
+# Channel ids, and channel URLs by id or by handle
+CHANNEL_ID_PATTERN = re.compile(r'^UC[\w-]{22}$')
+CHANNEL_URL_PATTERN = re.compile(r'(?:https?://)?(?:www\.|m\.)?youtube\.com/(?:channel/(UC[\w-]{22})|(@[\w.-]+))')
+# Partial response masks (the fields= parameter) of every call, keeping only the keys the
+# fetchers read, so thumbnails, localizations and tags are neither downloaded nor parsed
+COMMENT_FIELDS = "id,snippet(authorDisplayName,textDisplay,publishedAt)"
+RESPONSE_FIELDS = {
+    'channel_search': "items/id/channelId",
+    'channel_handle': "items/id",
+    'channel_details': ("items(id,snippet(title,description,publishedAt),"
+                        "statistics(videoCount,viewCount,subscriberCount,hiddenSubscriberCount),"
+                        "status/privacyStatus,contentDetails/relatedPlaylists/uploads)"),
+    'uploads_playlist': "items/contentDetails/relatedPlaylists/uploads",
+    'playlists': "nextPageToken,items(id,etag,snippet/title)",
+    'playlist_items': "nextPageToken,items/contentDetails(videoId,videoPublishedAt)",
+    'video_search': "nextPageToken,items/id/videoId",
+    'video_details': ("items(id,snippet(title,description,publishedAt,thumbnails/default/url),"
+                      "statistics,contentDetails(duration,caption))"),
+    'video_statistics': "items(id,statistics)",
+    'comment_threads': (f"nextPageToken,items(id,snippet(totalReplyCount,topLevelComment({COMMENT_FIELDS})),"
+                        f"replies/comments({COMMENT_FIELDS}))"),
+    'comments': f"nextPageToken,items({COMMENT_FIELDS})",
+}
+# Seconds a resolved channel name or handle is trusted before it is looked up again
+CHANNEL_ID_CACHE_TTL = 30 * 24 * 3600
+# Seconds after which an unfinished harvest job is discarded from the journal
+JOURNAL_MAX_AGE = 7 * 24 * 3600
+
+# Quota units charged per YouTube Data API call
+QUOTA_COSTS = {
+    'search.list': 100,
+    'channels.list': 1,
+    'playlists.list': 1,
+    'playlistItems.list': 1,
+    'videos.list': 1,
+    'commentThreads.list': 1,
+    'comments.list': 1,
+}
+DEFAULT_QUOTA_COST = 1
+DEFAULT_DAILY_QUOTA = 10000
+# Errors worth retrying with backoff, and error reasons meaning the daily quota is gone
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRYABLE_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded', 'backendError', 'internalError'}
+QUOTA_EXHAUSTED_REASONS = {'quotaExceeded', 'dailyLimitExceeded'}
+
+# Endpoint of the YouTube Data API v3 resources, as in the discovery document
+YOUTUBE_API_URL = "https://youtube.googleapis.com/youtube/v3/"
+# Trimmed YouTube Data API v3 discovery document bundled with the app. It only
+# describes the list methods the fetchers call, which makes building clients and
+# requests cheaper than with the full document shipped with google-api-python-client
+DISCOVERY_DOCUMENT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "youtube_v3_discovery.json")
+DISCOVERY_RESOURCES = ('search', 'channels', 'playlists', 'playlistItems', 'videos', 'commentThreads', 'comments')
+# List method parameters newer than the discovery document of the pinned client library
+DISCOVERY_EXTRA_PARAMETERS = {
+    'channels': {'forHandle': {'type': 'string', 'location': 'query',
+                               'description': "Return the channel associated with a YouTube handle."}},
+}
+# Requests the async transport keeps in flight, and the keep-alive connections it pools
+ASYNC_MAX_CONCURRENCY = 20
+
+# Seconds a cached API response stays fresh, per YouTube Data API resource
+RESPONSE_CACHE_TTLS = {
+    'search': 24 * 3600,
+    'channels': 6 * 3600,
+    'playlists': 6 * 3600,
+    'playlistItems': 3600,
+    'videos': 3600,
+    'commentThreads': 900,
+    'comments': 900,
+}
+DEFAULT_RESPONSE_CACHE_TTL = 3600
+# Header marking responses served ('hit') or revalidated ('revalidated') by the response cache
+RESPONSE_CACHE_HEADER = 'x-response-cache'
+
+# Keys of a channel harvest that are streamed as record batches
+STREAMED_RECORD_KEYS = ('video_details', 'video_statistics', 'video_comments')
+# Maximum number of record batches waiting between the harvester and the database writers
+STREAM_QUEUE_SIZE = 16
+# MongoDB collection and unique key receiving every streamed channel record
+STREAMED_COLLECTIONS = {
+    'channel_details': ('channels', 'channel_id'),
+    'playlist_ids': ('playlists', 'playlist_id'),
+    'video_details': ('videos', 'video_id'),
+    'video_statistics': ('videos', 'video_id'),
+    'video_comments': ('comments', 'comment_id'),
+}
+
+# Unique key of every MongoDB collection written by the harvester
+MONGODB_UNIQUE_KEYS = {
+    'channels': 'channel_id',
+    'playlists': 'playlist_id',
+    'videos': 'video_id',
+    'comments': 'comment_id',
+    'harvest_state': 'channel_id',
+}
+MONGODB_BATCH_SIZE = 1000
+
+# Columns of every MySQL table, primary key first, in foreign key dependency order
+MYSQL_TABLE_COLUMNS = {
+    'channels': ('channel_id', 'channel_name', 'channel_type', 'channel_status', 'video_count',
+                 'view_count', 'subs_count', 'publish_date', 'description', 'hidden_subs_count'),
+    'playlists': ('playlist_id', 'channel_id', 'playlist_name'),
+    'videos': ('video_id', 'channel_id', 'title', 'description', 'published_at', 'view_count',
+               'like_count', 'dislike_count', 'comment_count', 'favorite_count', 'duration_seconds',
+               'thumbnail_url', 'caption_status'),
+    'comments': ('comment_id', 'video_id', 'commenter_name', 'comment_text', 'comment_published_at'),
+}
+MYSQL_COUNTER_COLUMNS = {'video_count', 'view_count', 'subs_count', 'like_count', 'dislike_count',
+                         'comment_count', 'favorite_count'}
+MYSQL_BATCH_SIZE = 1000
+
+# Versioned changes to the base MySQL schema, applied in order by create_mysql_tables.
+# MySQL commits every DDL statement on its own, so a statement that is not idempotent
+# is paired with the precondition under which it still has to run: ('column', table,
+# column) or ('no_column', ...) for a column that must exist or not, ('no_index', table,
+# index) for an index that must not exist yet. A half-applied migration then resumes.
+MYSQL_MIGRATIONS = (
+    (1, "Widen counters to BIGINT", (
+        """ALTER TABLE channels MODIFY video_count BIGINT, MODIFY view_count BIGINT, MODIFY subs_count BIGINT""",
+        """ALTER TABLE videos MODIFY view_count BIGINT, MODIFY like_count BIGINT, MODIFY dislike_count BIGINT,
+           MODIFY comment_count BIGINT, MODIFY favorite_count BIGINT""",
+    )),
+    (2, "Store video duration in seconds", (
+        ("""ALTER TABLE videos ADD COLUMN duration_seconds INT UNSIGNED AFTER favorite_count""",
+         ('no_column', 'videos', 'duration_seconds')),
+        ("""UPDATE videos SET duration_seconds = TIME_TO_SEC(duration) WHERE duration IS NOT NULL""",
+         ('column', 'videos', 'duration')),
+        ("""ALTER TABLE videos DROP COLUMN duration""", ('column', 'videos', 'duration')),
+    )),
+    (3, "Index the dashboard queries", (
+        # Per-channel joins, aggregates and the per-year filter
+        ("""CREATE INDEX idx_videos_channel_published ON videos (channel_id, published_at)""",
+         ('no_index', 'videos', 'idx_videos_channel_published')),
+        ("""CREATE INDEX idx_videos_published_at ON videos (published_at)""",
+         ('no_index', 'videos', 'idx_videos_published_at')),
+        # Top-10 queries read the first rows of these indexes instead of sorting the table
+        ("""CREATE INDEX idx_videos_view_count ON videos (view_count)""",
+         ('no_index', 'videos', 'idx_videos_view_count')),
+        ("""CREATE INDEX idx_videos_like_count ON videos (like_count)""",
+         ('no_index', 'videos', 'idx_videos_like_count')),
+        ("""CREATE INDEX idx_videos_comment_count ON videos (comment_count)""",
+         ('no_index', 'videos', 'idx_videos_comment_count')),
+        ("""CREATE INDEX idx_channels_video_count ON channels (video_count)""",
+         ('no_index', 'channels', 'idx_channels_video_count')),
+        ("""CREATE INDEX idx_comments_video_published ON comments (video_id, comment_published_at)""",
+         ('no_index', 'comments', 'idx_comments_video_published')),
+        ("""CREATE INDEX idx_comments_published_at ON comments (comment_published_at)""",
+         ('no_index', 'comments', 'idx_comments_published_at')),
+    )),
+)
+# Connections opened up front and kept open by every shared MySQL connection pool
+# (mysql-connector allows up to 32). A session uses one connection at a time, for the
+# loader or the queries, so a few cover concurrent sessions
+MYSQL_POOL_SIZE = int(os.environ.get('MYSQL_POOL_SIZE', 3))
+# Seconds to wait for a pooled MySQL connection before opening a dedicated one
+MYSQL_POOL_TIMEOUT = 5.0
+
+# Foreign key column and parent table of every child MySQL table
+MYSQL_PARENT_TABLES = {
+    'playlists': ('channel_id', 'channels'),
+    'videos': ('channel_id', 'channels'),
+    'comments': ('video_id', 'videos'),
+}
+# Tables whose stored rows are upserted again on import to refresh their values
+MYSQL_REFRESHED_TABLES = {'channels', 'playlists', 'videos'}
+# Comment tables above this many rows are indexed with a Bloom filter instead of a set
+BLOOM_FILTER_THRESHOLD = 1000000
+# Columns besides the primary key the table viewer can sort by, and the page sizes it offers
+TABLE_VIEW_SORT_COLUMNS = {
+    'channels': ('channel_name', 'video_count', 'view_count', 'subs_count', 'publish_date'),
+    'playlists': ('channel_id', 'playlist_name'),
+    'videos': ('channel_id', 'published_at', 'view_count', 'like_count', 'comment_count', 'duration_seconds',
+               'title'),
+    'comments': ('video_id', 'comment_published_at'),
+}
+TABLE_VIEW_PAGE_SIZES = (50, 100, 500, 1000)
+# Rows read from the cursor at once by the table viewer
+TABLE_VIEW_FETCH_SIZE = 200
+# Server-side filter operators of the table viewer
+TABLE_VIEW_FILTER_OPERATORS = {
+    'contains': "{column} LIKE %s",
+    '=': "{column} = %s",
+    '>=': "{column} >= %s",
+    '<=': "{column} <= %s",
+}
+MYSQL_DATETIME_COLUMNS = {'publish_date', 'published_at', 'comment_published_at'}
+
+# In-memory size cap of cached dashboard query results, and where evicted results spill
+QUERY_CACHE_MAX_BYTES = 256 * 1024 * 1024
+QUERY_CACHE_SPILL_DIR = ".query_cache"
+# Files the metrics of the last harvest are exported to
+METRICS_JSON_PATH = "harvest_metrics.json"
+METRICS_PROMETHEUS_PATH = "harvest_metrics.prom"
+# Video counters refreshed by incremental harvests
+VIDEO_STATISTICS_COLUMNS = ('view_count', 'like_count', 'dislike_count', 'comment_count', 'favorite_count')
+
+# Video durations as returned by videos.list, e.g. 'PT1H2M3S', 'P1DT2H' or 'P2W', and
+# the 'HH:MM:SS' form stored by earlier harvests
+ISO8601_DURATION_PATTERN = (r'^P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?'
+                            r'(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+(?:\.\d+)?)S)?)?$')
+HH_MM_SS_PATTERN = r'^(?P<hours>\d+):(?P<minutes>\d{1,2}):(?P<seconds>\d{1,2})$'
+DURATION_UNIT_SECONDS = {'weeks': 7 * 86400, 'days': 86400, 'hours': 3600, 'minutes': 60, 'seconds': 1}
+# Timestamp formats of API responses ('Z' is UTC) and of earlier harvests
+TIMESTAMP_FORMATS = ('%Y-%m-%dT%H:%M:%SZ', '%Y-%m-%dT%H:%M:%S.%fZ', '%Y-%m-%d %H:%M:%S')
+# Normalized timestamp columns holding a calendar date, loaded into MySQL DATE columns
+RECORD_DATE_COLUMNS = {'publish_date'}
+
+
+class ResponseCache:
+    """
+        SQLite backed store of YouTube API responses with per-resource TTLs,
+        LRU size eviction and ETags for conditional revalidation.
+            """
+
+    def __init__(self, path=".youtube_cache.sqlite", max_bytes=512 * 1024 * 1024, ttls=None):
+        """
+            Opens (or creates) the cache database.
+
+            Args:
+                path (str): The SQLite file holding the cached responses.
+                max_bytes (int): Total body size above which least recently used entries are evicted.
+                ttls (dict): Freshness lifetime in seconds per API resource.
+                    """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = dict(RESPONSE_CACHE_TTLS, **(ttls or {}))
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                cache_key TEXT PRIMARY KEY,
+                etag TEXT,
+                headers TEXT,
+                body BLOB,
+                size INTEGER,
+                expires_at REAL,
+                last_access REAL
+            )
+        """)
+        self._connection.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self._connection.commit()
+        self._total_size = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def cache_key(uri):
+        """
+            Builds the cache key of a request from its endpoint and parameters,
+            leaving out the API key so entries are shared between keys.
+                """
+        parts = urlsplit(uri)
+        params = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                        if name != 'key')
+        return f"{parts.path}?{urlencode(params)}"
+
+    def ttl_for(self, uri):
+        """
+            Returns the freshness lifetime of the resource addressed by uri.
+                """
+        resource = urlsplit(uri).path.rstrip('/').rsplit('/', 1)[-1]
+        return self.ttls.get(resource, DEFAULT_RESPONSE_CACHE_TTL)
+
+    def get(self, key):
+        """
+            Returns (headers, body, etag, is_fresh) of a cached entry, or None.
+                """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT headers, body, etag, expires_at FROM responses WHERE cache_key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE responses SET last_access = ? WHERE cache_key = ?", (time.time(), key))
+            self._connection.commit()
+        headers, body, etag, expires_at = row
+        return json.loads(headers), body, etag, expires_at > time.time()
+
+    def put(self, key, headers, body, etag, ttl):
+        """
+            Stores a response and evicts least recently used entries above max_bytes.
+                """
+        now = time.time()
+        with self._lock:
+            previous = self._connection.execute(
+                "SELECT size FROM responses WHERE cache_key = ?", (key,)).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, etag, json.dumps(headers), sqlite3.Binary(body), len(body), now + ttl, now))
+            self._total_size += len(body) - (previous[0] if previous else 0)
+            self._evict()
+            self._connection.commit()
+
+    def refresh(self, key, ttl):
+        """
+            Marks an entry as fresh again after a 304 Not Modified revalidation.
+                """
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "UPDATE responses SET expires_at = ?, last_access = ? WHERE cache_key = ?", (now + ttl, now, key))
+            self._connection.commit()
+
+    def _evict(self):
+        while self._total_size > self.max_bytes:
+            row = self._connection.execute(
+                "SELECT cache_key, size FROM responses ORDER BY last_access LIMIT 1").fetchone()
+            if row is None:
+                self._total_size = 0
+                break
+            self._connection.execute("DELETE FROM responses WHERE cache_key = ?", (row[0],))
+            self._total_size -= row[1]
+
+    def clear(self):
+        """
+            Removes every cached response.
+                """
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+            self._connection.commit()
+            self._total_size = 0
+
+
+class CachingHttp:
+    """
+        Wraps an httplib2.Http so GET requests are answered from a ResponseCache and
+        stale entries are revalidated with If-None-Match.
+            """
+
+    def __init__(self, response_cache, http=None):
+        self.http = http if http is not None else httplib2.Http()
+        self.response_cache = response_cache
+
+    def close(self):
+        self.http.close()
+
+    @staticmethod
+    def _cached_response(headers, source):
+        """
+            Builds the response of a cached body, marked so the request scheduler does
+            not charge quota for it.
+                """
+        response = httplib2.Response(headers)
+        response[RESPONSE_CACHE_HEADER] = source
+        return response
+
+    def request(self, uri, method="GET", body=None, headers=None, *args, **kwargs):
+        if method != "GET":
+            return self.http.request(uri, method, body, headers, *args, **kwargs)
+
+        cache = self.response_cache
+        key = cache.cache_key(uri)
+        ttl = cache.ttl_for(uri)
+        cached = cache.get(key)
+        headers = dict(headers or {})
+        if cached is not None:
+            cached_headers, cached_body, etag, is_fresh = cached
+            if is_fresh:
+                cache.hits += 1
+                return self._cached_response(cached_headers, 'hit'), cached_body
+            if etag:
+                headers['If-None-Match'] = etag
+
+        response, content = self.http.request(uri, method, body, headers, *args, **kwargs)
+        if response.status == 304 and cached is not None:
+            cache.revalidated += 1
+            cache.refresh(key, ttl)
+            return self._cached_response(cached[0], 'revalidated'), cached[1]
+
+        cache.misses += 1
+        if response.status == 200:
+            stored_headers = dict(response)
+            stored_headers['status'] = '200'
+            etag = response.get('etag')
+            if etag is None:
+                try:
+                    etag = json.loads(content).get('etag')
+                except (ValueError, AttributeError):
+                    etag = None
+            cache.put(key, stored_headers, content, etag, ttl)
+        return response, content
+
+
+class AsyncYouTubeTransport:
+    """
+        Sends YouTube Data API v3 list requests over a pooled httpx.AsyncClient, which
+        keeps connections alive between requests and multiplexes them over HTTP/2.
+        A semaphore caps the requests in flight, so one event loop can page through
+        many playlists and videos at once without flooding the API. Responses are
+        not routed through the response cache.
+            """
+
+    def __init__(self, max_concurrency=ASYNC_MAX_CONCURRENCY, http2=True, timeout=30.0, transport=None):
+        """
+            Initializes the transport. It must be created inside the event loop using it.
+
+            Args:
+                max_concurrency (int): Maximum number of requests in flight.
+                http2 (bool): Whether to negotiate HTTP/2, otherwise HTTP/1.1 keep-alive is used.
+                timeout (float): Connect and read timeout of a request in seconds.
+                transport (httpx.AsyncBaseTransport): Replaces the network transport, e.g. for benchmarks.
+                    """
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        limits = httpx.Limits(max_connections=self.max_concurrency,
+                              max_keepalive_connections=self.max_concurrency)
+        self.client = httpx.AsyncClient(base_url=YOUTUBE_API_URL, http2=http2, limits=limits,
+                                        timeout=httpx.Timeout(timeout, pool=None), transport=transport)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    @staticmethod
+    def _query(params, api_key):
+        # Same encoding as googleapiclient: unset parameters are left out, booleans are lowercase
+        query = {name: str(value).lower() if isinstance(value, bool) else value
+                 for name, value in params.items() if value is not None}
+        query['prettyPrint'] = 'false'
+        if api_key:
+            query['key'] = api_key
+        return query
+
+    async def send(self, resource, params, api_key=None):
+        """
+            Sends a list request of resource, e.g. 'videos'.
+
+            Returns:
+                tuple: The httplib2.Response carrying the status and headers, and the body,
+                    as RequestScheduler.execute_async expects.
+                    """
+        async with self._semaphore:
+            response = await self.client.get(resource, params=self._query(params, api_key))
+        headers = dict(response.headers)
+        headers['status'] = str(response.status_code)
+        headers['content-location'] = str(response.url.copy_remove_param('key'))
+        result = httplib2.Response(headers)
+        result.reason = response.reason_phrase
+        return result, response.content
+
+
+class HarvestJournal:
+    """
+        SQLite job journal that persists the progress of a harvest: playlist page
+        tokens, fetched video and comment batches and completed channels, so a
+        restarted harvest of the same channels resumes where it stopped.
+            """
+
+    def __init__(self, path=".harvest_journal.sqlite", max_age=JOURNAL_MAX_AGE):
+        """
+            Opens (or creates) the journal database.
+
+            Args:
+                path (str): The SQLite file holding the journal.
+                max_age (int): Seconds after which an unfinished job is discarded.
+                    """
+        self.path = path
+        self.max_age = max_age
+        self.job_id = None
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                description TEXT,
+                started_at REAL
+            )
+        """)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                job_id TEXT,
+                entry_key TEXT,
+                value TEXT,
+                PRIMARY KEY (job_id, entry_key)
+            )
+        """)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                job_id TEXT,
+                entry_key TEXT,
+                page_index INTEGER,
+                value TEXT,
+                PRIMARY KEY (job_id, entry_key, page_index)
+            )
+        """)
+        self._connection.commit()
+
+    def start(self, channel_names, incremental=False):
+        """
+            Starts the job harvesting channel_names, or resumes it if it was interrupted.
+
+            Returns:
+                int: The number of journal entries recovered from an interrupted run.
+                    """
+        description = json.dumps({'channels': list(channel_names), 'incremental': bool(incremental)})
+        self.job_id = hashlib.sha1(description.encode('utf-8')).hexdigest()
+        self.purge()
+        with self._lock:
+            self._connection.execute("INSERT OR IGNORE INTO jobs VALUES (?, ?, ?)",
+                                     (self.job_id, description, time.time()))
+            self._connection.commit()
+            return sum(self._connection.execute(
+                f"SELECT COUNT(*) FROM {table} WHERE job_id = ?", (self.job_id,)).fetchone()[0]
+                for table in ('entries', 'pages'))
+
+    def get(self, key):
+        """
+            Returns the value recorded under key for the current job, or None.
+                """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM entries WHERE job_id = ? AND entry_key = ?", (self.job_id, key)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key, value):
+        """
+            Records value under key for the current job.
+                """
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+                                     (self.job_id, key, json.dumps(value)))
+            self._connection.commit()
+
+    def pages(self, key):
+        """
+            Returns the values appended under key for the current job, in page order.
+                """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT value FROM pages WHERE job_id = ? AND entry_key = ? ORDER BY page_index",
+                (self.job_id, key)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def append(self, key, page_index, value):
+        """
+            Records the value of one page under key for the current job, leaving the
+            earlier pages untouched.
+                """
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)",
+                                     (self.job_id, key, page_index, json.dumps(value)))
+            self._connection.commit()
+
+    def complete(self):
+        """
+            Marks the current job as finished and discards its entries.
+                """
+        with self._lock:
+            self._delete_jobs([self.job_id])
+            self._connection.commit()
+        self.job_id = None
+
+    def purge(self):
+        """
+            Discards the jobs started more than max_age seconds ago, with their entries.
+                """
+        with self._lock:
+            job_ids = [row[0] for row in self._connection.execute(
+                "SELECT job_id FROM jobs WHERE started_at < ?", (time.time() - self.max_age,))]
+            if job_ids:
+                self._delete_jobs(job_ids)
+                self._connection.commit()
+
+    def _delete_jobs(self, job_ids):
+        for table in ('entries', 'pages', 'jobs'):
+            self._connection.executemany(f"DELETE FROM {table} WHERE job_id = ?", [(job_id,) for job_id in job_ids])
+
+    def interrupted_jobs(self):
+        """
+            Returns the descriptions of jobs that were started but never completed.
+                """
+        with self._lock:
+            rows = self._connection.execute("SELECT description FROM jobs ORDER BY started_at").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    @staticmethod
+    def batch_key(kind, scope, batch):
+        """
+            Returns the entry key of a batch of ids, e.g. 'videos:<channel id>:<digest>'.
+            The digest covers every id, so two batches only share a key if they hold the
+            same ids in the same order.
+                """
+        return f"{kind}:{scope}:{hashlib.sha1(','.join(batch).encode()).hexdigest()}"
+
+
+class ChannelIdCache:
+    """
+        SQLite backed map of channel names, handles and URLs to channel ids, so each
+        channel is searched for only once instead of on every run.
+            """
+
+    def __init__(self, path=".channel_ids.sqlite", ttl=CHANNEL_ID_CACHE_TTL):
+        """
+            Opens (or creates) the cache database.
+
+            Args:
+                path (str): The SQLite file holding the cache.
+                ttl (int): Seconds after which a resolved name is looked up again.
+                    """
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS channel_ids (
+                reference TEXT PRIMARY KEY,
+                channel_id TEXT,
+                resolved_at REAL
+            )
+        """)
+        self._connection.commit()
+
+    def get(self, reference):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT channel_id, resolved_at FROM channel_ids WHERE reference = ?", (reference,)).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return row[0]
+
+    def put(self, reference, channel_id):
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO channel_ids VALUES (?, ?, ?)",
+                                     (reference, channel_id, time.time()))
+            self._connection.commit()
+
+
+class BloomFilter:
+    """
+        Compact probabilistic set of strings. Membership tests can return false
+        positives at roughly error_rate but never false negatives.
+            """
+
+    def __init__(self, capacity, error_rate=0.01):
+        """
+            Sizes the bit array for the expected number of items.
+
+            Args:
+                capacity (int): The expected number of items.
+                error_rate (float): The acceptable false positive rate.
+                    """
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class QueryResultCache:
+    """
+        Size-capped LRU cache of query result DataFrames, keyed by the warehouse,
+        the query text and the warehouse data version. Results of older versions are
+        dropped as soon as a newer version is seen. Least recently used results over
+        max_bytes are spilled to pickle files in spill_dir if given, else dropped.
+            """
+
+    def __init__(self, max_bytes=QUERY_CACHE_MAX_BYTES, spill_dir=None):
+        """
+            Initializes an empty cache.
+
+            Args:
+                max_bytes (int): Maximum in-memory size of the cached DataFrames.
+                spill_dir (str): Directory evicted results are written to with DataFrame.to_pickle,
+                    which needs no extra package and keeps every column's dtype.
+                    """
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (warehouse, version, DataFrame, size in bytes)
+        self._spilled = {}  # key -> (warehouse, version, pickle file path)
+        self._versions = {}  # warehouse -> data version of its cached results
+        self._lock = threading.Lock()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    @staticmethod
+    def cache_key(warehouse, query, version):
+        return hashlib.sha1(f"{warehouse}\n{version}\n{' '.join(query.split())}".encode('utf-8')).hexdigest()
+
+    def _invalidate(self, warehouse, version):
+        """
+            Drops the results of warehouse cached under another data version.
+                """
+        if self._versions.get(warehouse) == version:
+            return
+        self._versions[warehouse] = version
+        for key in [key for key, entry in self._entries.items() if entry[0] == warehouse]:
+            self.size -= self._entries.pop(key)[3]
+        for key in [key for key, entry in self._spilled.items() if entry[0] == warehouse]:
+            self._remove_spill(self._spilled.pop(key)[2])
+
+    @staticmethod
+    def _remove_spill(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def get(self, warehouse, query, version):
+        """
+            Returns the cached result of query at the given data version, or None.
+                """
+        key = self.cache_key(warehouse, query, version)
+        with self._lock:
+            self._invalidate(warehouse, version)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][2]
+            spilled = self._spilled.get(key)
+            if spilled is None:
+                self.misses += 1
+                return None
+        try:
+            result = pd.read_pickle(spilled[2])
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            print(f"Could not read the spilled query result {spilled[2]}: {e}")
+            with self._lock:
+                self.misses += 1
+            return None
+        self.put(warehouse, query, version, result)
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, warehouse, query, version, result):
+        """
+            Caches the result DataFrame of query, evicting least recently used results.
+                """
+        key = self.cache_key(warehouse, query, version)
+        size = int(result.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            self._invalidate(warehouse, version)
+            if key in self._entries:
+                self.size -= self._entries.pop(key)[3]
+            if key in self._spilled:
+                self._remove_spill(self._spilled.pop(key)[2])
+            self._entries[key] = (warehouse, version, result, size)
+            self.size += size
+            evicted = []
+            while self.size > self.max_bytes and len(self._entries) > 1:
+                evicted_key, entry = self._entries.popitem(last=False)
+                self.size -= entry[3]
+                evicted.append((evicted_key, entry))
+        for evicted_key, (evicted_warehouse, evicted_version, evicted_result, _) in evicted:
+            self._spill(evicted_key, evicted_warehouse, evicted_version, evicted_result)
+
+    def _spill(self, key, warehouse, version, result):
+        if not self.spill_dir:
+            return
+        path = os.path.join(self.spill_dir, f"{key}.pkl")
+        try:
+            result.to_pickle(path)
+        except (OSError, pickle.PicklingError) as e:
+            print(f"Could not spill a cached query result to {path}: {e}")
+            return
+        with self._lock:
+            # The warehouse may have been reloaded while the file was written
+            if self._versions.get(warehouse) == version:
+                self._spilled[key] = (warehouse, version, path)
+                return
+        self._remove_spill(path)
+
+
+class HarvestMetrics:
+    """
+        Thread-safe timers and counters for the harvest and load stages, plus
+        per-endpoint API call statistics. Stage times are summed over all threads.
+            """
+
+    def __init__(self, max_samples=5000):
+        """
+            Initializes empty metrics.
+
+            Args:
+                max_samples (int): Latency samples kept per endpoint for percentiles.
+                    """
+        self.max_samples = max_samples
+        self.started_at = time.time()
+        self.stages = {}
+        self.endpoints = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """
+            Times the enclosed block as one run of stage name.
+                """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                entry = self.stages.setdefault(name, {'runs': 0, 'seconds': 0.0, 'rows': 0})
+                entry['runs'] += 1
+                entry['seconds'] += elapsed
+
+    def add_rows(self, stage, rows):
+        """
+            Adds rows processed by a stage, used for its rows per second.
+                """
+        with self._lock:
+            self.stages.setdefault(stage, {'runs': 0, 'seconds': 0.0, 'rows': 0})['rows'] += rows
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_call(self, endpoint, seconds, received_bytes=0, units=0, error=False, parse_seconds=0.0):
+        """
+            Records one API call of endpoint, with the size of its response body and the
+            time spent decoding it.
+                """
+        with self._lock:
+            entry = self.endpoints.setdefault(endpoint, {'calls': 0, 'errors': 0, 'units': 0, 'bytes': 0,
+                                                         'seconds': 0.0, 'parse_seconds': 0.0, 'samples': []})
+            entry['calls'] += 1
+            entry['errors'] += int(error)
+            entry['units'] += units
+            entry['bytes'] += received_bytes
+            entry['seconds'] += seconds
+            entry['parse_seconds'] += parse_seconds
+            samples = entry['samples']
+            if len(samples) < self.max_samples:
+                samples.append(seconds)
+            else:
+                # Reservoir sampling keeps an unbiased sample of all latencies
+                slot = random.randrange(entry['calls'])
+                if slot < self.max_samples:
+                    samples[slot] = seconds
+
+    @staticmethod
+    def _percentile(samples, fraction):
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def snapshot(self):
+        """
+            Returns the current metrics as a JSON serializable dict.
+                """
+        with self._lock:
+            stages = {name: dict(entry, rows_per_second=entry['rows'] / entry['seconds'] if entry['seconds'] else 0.0)
+                      for name, entry in self.stages.items()}
+            endpoints = {name: {'calls': entry['calls'], 'errors': entry['errors'], 'units': entry['units'],
+                                'bytes': entry['bytes'], 'bytes_per_call': entry['bytes'] / entry['calls'],
+                                'seconds': entry['seconds'], 'parse_seconds': entry['parse_seconds'],
+                                'parse_seconds_per_call': entry['parse_seconds'] / entry['calls'],
+                                'p50_seconds': self._percentile(entry['samples'], 0.50),
+                                'p95_seconds': self._percentile(entry['samples'], 0.95)}
+                         for name, entry in self.endpoints.items()}
+            counters = dict(self.counters)
+        return {
+            'elapsed_seconds': time.time() - self.started_at,
+            'api_calls': sum(entry['calls'] for entry in endpoints.values()),
+            'quota_units': sum(entry['units'] for entry in endpoints.values()),
+            'bytes_received': sum(entry['bytes'] for entry in endpoints.values()),
+            'stages': stages,
+            'endpoints': endpoints,
+            'counters': counters,
+        }
+
+    def export_json(self, path):
+        with open(path, 'w', encoding='utf-8') as metrics_file:
+            json.dump(self.snapshot(), metrics_file, indent=2)
+
+    def export_prometheus(self, path):
+        """
+            Writes the metrics in the Prometheus text exposition format.
+                """
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP youtube_harvest_{name} {help_text}")
+            lines.append(f"# TYPE youtube_harvest_{name} {kind}")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{label}"' for key, label in labels.items())
+                lines.append(f"youtube_harvest_{name}{{{label_text}}} {value}")
+
+        endpoints = snapshot['endpoints'].items()
+        stages = snapshot['stages'].items()
+        metric('api_calls_total', 'counter', 'YouTube API calls.',
+               [({'endpoint': name}, entry['calls']) for name, entry in endpoints])
+        metric('api_errors_total', 'counter', 'Failed YouTube API calls.',
+               [({'endpoint': name}, entry['errors']) for name, entry in endpoints])
+        metric('quota_units_total', 'counter', 'Quota units spent.',
+               [({'endpoint': name}, entry['units']) for name, entry in endpoints])
+        metric('bytes_received_total', 'counter', 'Response bytes received.',
+               [({'endpoint': name}, entry['bytes']) for name, entry in endpoints])
+        metric('parse_seconds_total', 'counter', 'Time spent decoding response bodies.',
+               [({'endpoint': name}, entry['parse_seconds']) for name, entry in endpoints])
+        metric('api_latency_seconds', 'gauge', 'YouTube API call latency percentiles.',
+               [({'endpoint': name, 'quantile': quantile}, entry[key]) for name, entry in endpoints
+                for quantile, key in (('0.5', 'p50_seconds'), ('0.95', 'p95_seconds'))])
+        metric('stage_seconds_total', 'counter', 'Time spent per stage, summed over threads.',
+               [({'stage': name}, entry['seconds']) for name, entry in stages])
+        metric('stage_rows_total', 'counter', 'Rows processed per stage.',
+               [({'stage': name}, entry['rows']) for name, entry in stages])
+        with open(path, 'w', encoding='utf-8') as metrics_file:
+            metrics_file.write('\n'.join(lines) + '\n')
+
+    def render_streamlit(self):
+        """
+            Displays the metrics panel in the Streamlit app.
+                """
+        snapshot = self.snapshot()
+        st.subheader("Harvest metrics")
+        columns = st.columns(4)
+        columns[0].metric("API calls", snapshot['api_calls'])
+        columns[1].metric("Quota units", snapshot['quota_units'])
+        columns[2].metric("MB received", f"{snapshot['bytes_received'] / 1e6:.2f}")
+        columns[3].metric("Elapsed (s)", f"{snapshot['elapsed_seconds']:.1f}")
+        if snapshot['stages']:
+            st.dataframe(pd.DataFrame.from_dict(snapshot['stages'], orient='index'))
+        if snapshot['endpoints']:
+            st.dataframe(pd.DataFrame.from_dict(snapshot['endpoints'], orient='index'))
+
+
+def timed_stage(stage, count_rows=False):
+    """
+        Decorates an analyzer method, or coroutine method, so each call is timed as a
+        run of stage in the analyzer's metrics, with the length of the returned list
+        counted as rows.
+            """
+    def decorator(method):
+        if asyncio.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(self, *args, **kwargs):
+                with self.metrics.stage(stage):
+                    result = await method(self, *args, **kwargs)
+                if count_rows and isinstance(result, list):
+                    self.metrics.add_rows(stage, len(result))
+                return result
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.stage(stage):
+                result = method(self, *args, **kwargs)
+            if count_rows and isinstance(result, list):
+                self.metrics.add_rows(stage, len(result))
+            return result
+        return wrapper
+    return decorator
+
+
+def parse_timestamps(values):
+    """
+        Parses a Series of API timestamps such as '2024-01-01T10:00:00Z', datetimes or
+        the 'YYYY-MM-DD HH:MM:SS' strings of earlier harvests to naive UTC datetime64.
+        Anything else becomes NaT.
+            """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return pd.to_datetime(values, utc=True).dt.tz_convert(None)
+    # Each known format is parsed explicitly, so pandas does not guess one per value
+    parsed = pd.to_datetime(values, format=TIMESTAMP_FORMATS[0], errors='coerce', utc=True)
+    for timestamp_format in TIMESTAMP_FORMATS[1:]:
+        pending = parsed.isna() & values.notna()
+        if not pending.any():
+            break
+        parsed[pending] = pd.to_datetime(values[pending], format=timestamp_format, errors='coerce', utc=True)
+    # Datetimes read back from MongoDB, mixed in with strings
+    remaining = values[parsed.isna() & values.notna()]
+    remaining = remaining[remaining.map(lambda value: hasattr(value, 'year'))]
+    if len(remaining):
+        parsed[remaining.index] = pd.to_datetime(remaining.tolist(), utc=True)
+    return parsed.dt.tz_convert(None)
+
+
+def parse_durations(values):
+    """
+        Converts a Series of ISO 8601 video durations, including the day and week forms,
+        or 'HH:MM:SS' strings to Int64 seconds. Anything else becomes <NA>.
+            """
+    # Uploads share a limited set of durations, so every distinct value is parsed once
+    codes, uniques = pd.factorize(values.astype(str))
+    text = pd.Series(uniques)
+    seconds = pd.Series(float('nan'), index=text.index)
+    for pattern in (ISO8601_DURATION_PATTERN, HH_MM_SS_PATTERN):
+        pending = seconds.isna()
+        if not pending.any():
+            break
+        parts = text[pending].str.extract(pattern).astype(float)
+        total = sum(parts[unit].fillna(0) * factor for unit, factor in DURATION_UNIT_SECONDS.items()
+                    if unit in parts.columns)
+        seconds[pending] = total.where(parts.notna().any(axis=1))
+    seconds = seconds.round().astype('Int64')
+    return pd.Series(seconds.take(codes).to_numpy(), index=values.index, dtype='Int64')
+
+
+def normalize_records(records):
+    """
+        Normalization stage shared by the MongoDB and MySQL sinks. Converts a batch of
+        harvested records, or of documents read back from MongoDB, to a typed DataFrame
+        in one columnar pass.
+
+        Counters become Int64, with <NA> for missing or hidden counts. Timestamps become
+        naive UTC datetime64, and the ISO 8601 duration becomes Int64 duration_seconds,
+        replacing duration.
+
+        Returns:
+            pandas.DataFrame: One row per record.
+                """
+    frame = pd.DataFrame.from_records(list(records))
+    for column in list(frame.columns):
+        if column in MYSQL_COUNTER_COLUMNS or column == 'duration_seconds':
+            frame[column] = pd.to_numeric(frame[column], errors='coerce').astype('Int64')
+        elif column in MYSQL_DATETIME_COLUMNS:
+            frame[column] = parse_timestamps(frame[column])
+    if 'duration' in frame.columns:
+        durations = parse_durations(frame.pop('duration'))
+        frame['duration_seconds'] = (frame['duration_seconds'].fillna(durations)
+                                     if 'duration_seconds' in frame.columns else durations)
+    return frame
+
+
+def _python_values(series, as_date=False):
+    """
+        Returns the values of a normalized column as Python objects, with None for missing values.
+            """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        # NumPy converts microsecond and day precision values to datetime and date objects, and NaT to None
+        return series.to_numpy(dtype='datetime64[D]' if as_date else 'datetime64[us]').astype(object).tolist()
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def normalized_documents(frame, records):
+    """
+        Converts a normalized batch to MongoDB documents. Fields a record did not have
+        are left out instead of being stored as null.
+            """
+    columns = list(frame.columns)
+    values = [_python_values(frame[column]) for column in columns]
+    documents = [dict(zip(columns, row)) for row in zip(*values)]
+    for column, column_values in zip(columns, values):
+        if None in column_values:
+            for document, record in zip(documents, records):
+                if document[column] is None and column not in record:
+                    del document[column]
+    return documents
+
+
+def normalized_rows(frame, columns):
+    """
+        Returns the rows of a normalized batch as tuples of Python values in the order
+        of columns, for the MySQL loaders. Missing values and columns are None.
+            """
+    frame = frame.reindex(columns=list(columns))
+    return list(zip(*(_python_values(frame[column], column in RECORD_DATE_COLUMNS) for column in columns)))
+
+
+def api_timestamp(value):
+    """
+        Formats a timestamp like the YouTube API ('2024-01-01T10:00:00Z'), so harvest
+        checkpoints compare directly with the publishedAt values of API responses.
+        Accepts datetimes and the 'YYYY-MM-DD HH:MM:SS' strings of earlier harvests.
+            """
+    if value is None or hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%dT%H:%M:%SZ') if value is not None else None
+    if ' ' in value:
+        return value.replace(' ', 'T') + 'Z'
+    return value
+
+
+class QuotaBudgetExceeded(Exception):
+    """
+        Raised when a request would exceed the daily quota budget, or the API
+        reports the project's quota as exhausted.
+            """
+
+
+class ApiKeyPool:
+    """
+        Set of YouTube API keys, each with its own quota counter. Requests are
+        dispatched to the least used key and keys reported as exhausted are skipped.
+            """
+
+    def __init__(self, api_keys, daily_budget_per_key=DEFAULT_DAILY_QUOTA):
+        """
+            Initializes the pool.
+
+            Args:
+                api_keys (list): The API keys, typically of different Google Cloud projects.
+                daily_budget_per_key (int): Quota units each key may spend in this run.
+                    """
+        self.api_keys = list(dict.fromkeys(key for key in api_keys if key))
+        if not self.api_keys:
+            raise ValueError("At least one YouTube API key is required.")
+        self.daily_budget_per_key = daily_budget_per_key
+        self.usage = dict.fromkeys(self.api_keys, 0)
+        self.exhausted = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.api_keys)
+
+    def acquire(self, cost):
+        """
+            Reserves cost units on the least used key that can still afford them.
+
+            Returns:
+                str: The API key to send the request with.
+
+            Raises:
+                QuotaBudgetExceeded: If no key has enough quota left.
+                    """
+        with self._lock:
+            candidates = [key for key in self.api_keys
+                          if key not in self.exhausted and self.usage[key] + cost <= self.daily_budget_per_key]
+            if not candidates:
+                raise QuotaBudgetExceeded(f"All {len(self.api_keys)} API keys are out of quota")
+            api_key = min(candidates, key=self.usage.get)
+            self.usage[api_key] += cost
+            return api_key
+
+    def release(self, api_key, cost):
+        """
+            Gives back units reserved on api_key for a request that cost no quota.
+                """
+        with self._lock:
+            self.usage[api_key] -= cost
+
+    def mark_exhausted(self, api_key):
+        """
+            Takes a key out of rotation after the API reported its quota as exhausted.
+                """
+        with self._lock:
+            self.exhausted.add(api_key)
+
+    def summary(self):
+        """
+            Returns the units used and the status of every key, identified by its last 4 characters.
+                """
+        with self._lock:
+            return [{'key': f"...{key[-4:]}", 'units': self.usage[key], 'exhausted': key in self.exhausted}
+                    for key in self.api_keys]
+
+
+class RequestScheduler:
+    """
+        Central gate for YouTube API requests: accounts quota per endpoint, limits
+        the request rate with a token bucket and retries transient errors, including
+        timeouts and dropped connections, with exponential backoff and jitter.
+            """
+
+    def __init__(self, daily_budget=DEFAULT_DAILY_QUOTA, requests_per_second=50.0, burst=50,
+                 max_retries=5, backoff_base=1.0, backoff_cap=32.0, metrics=None):
+        """
+            Initializes the scheduler.
+
+            Args:
+                daily_budget (int): Quota units this run may spend; requests that would
+                    exceed it raise QuotaBudgetExceeded before being sent. Spend is not
+                    carried over between runs.
+                requests_per_second (float): Sustained request rate of the token bucket.
+                burst (int): The number of requests that may be sent back to back.
+                max_retries (int): Retries of a request failing with a retryable error or
+                    a transport error.
+                backoff_base (float): Delay in seconds before the first retry.
+                backoff_cap (float): Maximum delay in seconds between retries.
+                metrics (HarvestMetrics): Receives the latency, size and cost of every call.
+                    """
+        self.daily_budget = daily_budget
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.metrics = metrics
+        self.quota_used = 0
+        self.ledger = {}
+        self.retries = 0
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def quota_remaining(self):
+        return self.daily_budget - self.quota_used
+
+    def _reserve_quota(self, endpoint, key_pool=None):
+        cost = QUOTA_COSTS.get(endpoint, DEFAULT_QUOTA_COST)
+        with self._lock:
+            if self.quota_used + cost > self.daily_budget:
+                raise QuotaBudgetExceeded(
+                    f"{endpoint} needs {cost} units but only {self.quota_remaining} of the "
+                    f"{self.daily_budget} unit budget remain")
+            api_key = key_pool.acquire(cost) if key_pool is not None else None
+            self.quota_used += cost
+            entry = self.ledger.setdefault(endpoint, {'calls': 0, 'units': 0})
+            entry['calls'] += 1
+            entry['units'] += cost
+        return api_key
+
+    def _refund_quota(self, endpoint, api_key, key_pool=None):
+        """
+            Returns the units reserved for a request that was answered from the response cache.
+                """
+        cost = QUOTA_COSTS.get(endpoint, DEFAULT_QUOTA_COST)
+        with self._lock:
+            if key_pool is not None:
+                key_pool.release(api_key, cost)
+            self.quota_used -= cost
+            entry = self.ledger[endpoint]
+            entry['calls'] -= 1
+            entry['units'] -= cost
+            if not entry['calls']:
+                del self.ledger[endpoint]
+
+    def _take_token(self):
+        """
+            Takes a token from the bucket, returning 0, or returns the seconds until one is available.
+                """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.requests_per_second)
+            self._last_refill = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.requests_per_second
+
+    def _acquire_token(self):
+        wait = self._take_token()
+        while wait:
+            time.sleep(wait)
+            wait = self._take_token()
+
+    async def _acquire_token_async(self):
+        wait = self._take_token()
+        while wait:
+            await asyncio.sleep(wait)
+            wait = self._take_token()
+
+    @staticmethod
+    def error_reason(error):
+        """
+            Returns the reason of the first error reported in an HttpError body, e.g. 'quotaExceeded'.
+                """
+        try:
+            content = error.content.decode('utf-8') if isinstance(error.content, bytes) else error.content
+            return json.loads(content)['error']['errors'][0].get('reason')
+        except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+            return None
+
+    def execute(self, endpoint, build_request, key_pool=None):
+        """
+            Sends a request through the rate limiter, retrying transient failures.
+
+            With a key pool, every attempt is sent with the least used key, and a key
+            whose quota the API reports as exhausted is dropped in favour of the next.
+            Responses served or revalidated by the response cache are not charged.
+
+            Args:
+                endpoint (str): The API method, e.g. 'videos.list', used for quota accounting.
+                build_request (callable): Builds the googleapiclient HttpRequest to execute
+                    from an API key (None without a key pool).
+                key_pool (ApiKeyPool): The keys to dispatch the request to.
+
+            Returns:
+                dict: The decoded response.
+
+            Raises:
+                QuotaBudgetExceeded: If the budget or the project's daily quota is exhausted.
+                HttpError: If the request fails with a non-retryable error or after max_retries.
+                OSError: If the connection still times out or drops after max_retries.
+                    """
+        attempt = 0
+        while True:
+            api_key = self._reserve_quota(endpoint, key_pool)
+            self._acquire_token()
+            request = build_request(api_key)
+            # Response body bytes, seconds spent decoding it and whether the response cache answered
+            received = [0, 0.0, None]
+            parse_response = request.postproc
+
+            def postproc(resp, content):
+                received[0] = len(content or b'')
+                received[2] = resp.get(RESPONSE_CACHE_HEADER)
+                parse_started = time.perf_counter()
+                try:
+                    return parse_response(resp, content)
+                finally:
+                    received[1] = time.perf_counter() - parse_started
+
+            request.postproc = postproc
+            started = time.perf_counter()
+            try:
+                response = request.execute()
+                if received[2] is not None:
+                    self._refund_quota(endpoint, api_key, key_pool)
+                    if self.metrics is not None:
+                        self.metrics.increment('api_cache_hits')
+                elif self.metrics is not None:
+                    self.metrics.record_call(endpoint, time.perf_counter() - started, received[0],
+                                             QUOTA_COSTS.get(endpoint, DEFAULT_QUOTA_COST),
+                                             parse_seconds=received[1])
+                return response
+            except (HttpError, OSError, httplib2.HttpLib2Error) as e:
+                if self.metrics is not None:
+                    self.metrics.record_call(endpoint, time.perf_counter() - started, received[0],
+                                             QUOTA_COSTS.get(endpoint, DEFAULT_QUOTA_COST), error=True,
+                                             parse_seconds=received[1])
+                delay = self._retry_delay(endpoint, e, api_key, key_pool, attempt)
+                if delay is None:
+                    continue
+                time.sleep(delay)
+                attempt += 1
+
+    async def execute_async(self, endpoint, send, key_pool=None):
+        """
+            Sends a request of an AsyncYouTubeTransport through the rate limiter, with
+            the quota accounting, key rotation and retries of execute. Waiting for a
+            token or a retry suspends the coroutine instead of blocking the event loop.
+
+            Args:
+                endpoint (str): The API method, e.g. 'videos.list', used for quota accounting.
+                send (callable): Coroutine function sending the request with an API key
+                    (None without a key pool) and returning the response and its body.
+                key_pool (ApiKeyPool): The keys to dispatch the request to.
+
+            Returns:
+                dict: The decoded response.
+
+            Raises:
+                QuotaBudgetExceeded: If the budget or the project's daily quota is exhausted.
+                HttpError: If the request fails with a non-retryable error or after max_retries.
+                OSError: If the connection still times out or drops after max_retries.
+                    """
+        attempt = 0
+        while True:
+            api_key = self._reserve_quota(endpoint, key_pool)
+            await self._acquire_token_async()
+            started = time.perf_counter()
+            error = None
+            parse_seconds = 0.0
+            content = b''
+            try:
+                response, content = await send(api_key)
+            except (OSError, httpx.TransportError) as e:
+                error = e
+            else:
+                if response.status >= 300:
+                    error = HttpError(response, content, uri=response.get('content-location'))
+                else:
+                    parse_started = time.perf_counter()
+                    decoded = json.loads(content)
+                    parse_seconds = time.perf_counter() - parse_started
+            if self.metrics is not None:
+                self.metrics.record_call(endpoint, time.perf_counter() - started, len(content),
+                                         QUOTA_COSTS.get(endpoint, DEFAULT_QUOTA_COST), error=error is not None,
+                                         parse_seconds=parse_seconds)
+            if error is None:
+                return decoded
+            delay = self._retry_delay(endpoint, error, api_key, key_pool, attempt)
+            if delay is None:
+                continue
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _retry_delay(self, endpoint, error, api_key, key_pool, attempt):
+        """
+            Decides how a request that failed with error goes on. Transport errors, i.e.
+            timeouts and dropped or refused connections, are always retryable.
+
+            Returns:
+                float: Seconds to back off before retrying, or None to retry at once
+                    with the next key after the API reported api_key's quota as exhausted.
+
+            Raises:
+                QuotaBudgetExceeded: If the project's daily quota is exhausted.
+                Exception: The error itself if it is not retryable or max_retries is reached.
+                    """
+        if isinstance(error, HttpError):
+            status = getattr(error.resp, 'status', None)
+            reason = self.error_reason(error)
+            if reason in QUOTA_EXHAUSTED_REASONS:
+                if key_pool is not None and len(key_pool) > 1:
+                    key_pool.mark_exhausted(api_key)
+                    print(f"API key ...{api_key[-4:]} is out of quota, switching to the next key.")
+                    return None
+                raise QuotaBudgetExceeded(f"{endpoint}: YouTube API quota exhausted ({reason})") from error
+            retryable = status in RETRYABLE_STATUS_CODES or reason in RETRYABLE_REASONS
+        else:
+            retryable = True
+        if not retryable or attempt >= self.max_retries:
+            raise error
+        with self._lock:
+            self.retries += 1
+        if self.metrics is not None:
+            self.metrics.increment('api_retries')
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+
+# Marks the threads of the shared fan-out pools, which run nested fan-outs inline
+_fan_out_worker = threading.local()
+
+
+def _mark_fan_out_worker():
+    _fan_out_worker.active = True
+
+
+class _Failure:
+    """
+        Carries an exception from a worker thread to the consuming thread.
+            """
+
+    def __init__(self, error):
+        self.error = error
+
+
+@st.experimental_singleton
+def get_mongo_client(mongo_uri):
+    """
+        Returns the MongoClient of mongo_uri, shared by all reruns and sessions.
+        MongoClient is thread-safe and keeps its own connection pool.
+            """
+    return pymongo.MongoClient(mongo_uri)
+
+
+def _mysql_config(host, user, password, database=None, allow_local_infile=False):
+    config = {'host': host, 'user': user, 'password': password, 'allow_local_infile': allow_local_infile}
+    if database:
+        config['database'] = database
+    return config
+
+
+@st.experimental_singleton
+def get_mysql_pool(host, user, password, database=None, allow_local_infile=False, pool_size=MYSQL_POOL_SIZE):
+    """
+        Returns the MySQL connection pool of the given server and database, shared by
+        all reruns and sessions. Closing a pooled connection returns it to the pool.
+            """
+    config = _mysql_config(host, user, password, database, allow_local_infile)
+    pool_name = hashlib.sha1(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    return mysql_pooling.MySQLConnectionPool(pool_name=f"youtube_{pool_name}", pool_size=pool_size, **config)
+
+
+def connect_mysql(host, user, password, database=None, allow_local_infile=False, pool_size=MYSQL_POOL_SIZE,
+                  timeout=MYSQL_POOL_TIMEOUT):
+    """
+        Takes a connection from the shared pool of the given MySQL server and database.
+
+        While every pooled connection is in use, e.g. by other sessions or the streaming
+        loader, it waits up to timeout seconds for one to be returned and then opens a
+        dedicated connection, which is closed instead of pooled after use.
+            """
+    pool = get_mysql_pool(host, user, password, database, allow_local_infile, pool_size)
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+    while True:
+        try:
+            return pool.get_connection()
+        except mysql_connector.errors.PoolError:
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+            delay = min(delay * 2, 1.0)
+    print(f"All {pool_size} pooled MySQL connections are in use, opening a dedicated connection.")
+    return mysql_connector.connect(**_mysql_config(host, user, password, database, allow_local_infile))
+
+
+@st.experimental_singleton
+def get_query_result_cache(max_bytes=QUERY_CACHE_MAX_BYTES, spill_dir=None):
+    """
+        Returns the dashboard's query result cache, shared by all reruns and sessions.
+            """
+    return QueryResultCache(max_bytes, spill_dir)
+
+
+def trim_discovery_document(document):
+    """
+        Reduces a YouTube Data API v3 discovery document to the list methods of
+        DISCOVERY_RESOURCES and the schemas they reference.
+
+        googleapiclient builds every method of a resource whenever the resource is
+        accessed, so the fewer methods a document describes, the cheaper each request.
+            """
+    trimmed = {key: value for key, value in document.items() if key not in ('resources', 'schemas')}
+    trimmed['resources'] = {}
+    for resource in DISCOVERY_RESOURCES:
+        method = dict(document['resources'][resource]['methods']['list'])
+        method['parameters'] = dict(DISCOVERY_EXTRA_PARAMETERS.get(resource, {}), **method.get('parameters', {}))
+        trimmed['resources'][resource] = {'methods': {'list': method}}
+
+    # Follow $ref links from the methods through the schemas they use
+    schema_names = set()
+    pending = [trimmed['resources']]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, dict):
+            ref = value.get('$ref')
+            if ref and ref not in schema_names:
+                schema_names.add(ref)
+                pending.append(document['schemas'][ref])
+            pending.extend(item for key, item in value.items() if key != '$ref')
+        elif isinstance(value, list):
+            pending.extend(value)
+    trimmed['schemas'] = {name: document['schemas'][name] for name in sorted(schema_names)}
+    return trimmed
+
+
+@st.experimental_singleton
+def get_youtube_discovery_document(path=DISCOVERY_DOCUMENT_PATH):
+    """
+        Returns the parsed YouTube Data API v3 discovery document, loaded once per
+        process and never fetched over the network.
+
+        Args:
+            path (str): The trimmed document bundled with the app. If it is missing it is
+                rebuilt from the document shipped with google-api-python-client and
+                written there for the next start. None uses the full shipped document.
+                    """
+    if path is not None and os.path.exists(path):
+        with open(path, encoding='utf-8') as document_file:
+            return json.load(document_file)
+    document = json.loads(discovery_cache.get_static_doc("youtube", "v3"))
+    if path is None:
+        return document
+    document = trim_discovery_document(document)
+    try:
+        with open(path, 'w', encoding='utf-8') as document_file:
+            json.dump(document, document_file, separators=(',', ':'), sort_keys=True)
+    except OSError as e:
+        print(f"Could not cache the discovery document in {path}: {e}")
+    return document
+
+
 class YouTubeChannelAnalyzer:
     """
         Represents a resource object.
             """
 
-    def __init__(self):
+    def __init__(self):
+        """
+            Initializes the Resource object.
+                """
+
+        self._local = threading.local()
+        self.api_key = None
+        self.key_pool = None
+        self.response_cache = None
+        self.journal = None
+        self.channel_cache = None
+        self.use_field_masks = True  # Request only the RESPONSE_FIELDS the fetchers read
+        self.discovery_document_path = DISCOVERY_DOCUMENT_PATH  # None for the library's full document
+        self.max_concurrency = ASYNC_MAX_CONCURRENCY  # Requests in flight with the async transport
+        self._async_transport = None
+        self._channel_ids = {}  # channel name -> resolved channel id
+        self._channel_details = {}  # channel id -> details prefetched by prefetch_channels, None if unknown
+        self.metrics = HarvestMetrics()
+        self.scheduler = RequestScheduler(metrics=self.metrics)
+        self._fan_out_lock = threading.Lock()
+        self._fan_out_executor = None
+        self.max_workers = 1
+        self.comment_limit = 100
+        self.comment_order = "relevance"
+        self.expand_replies = False
+        self.mongo_client = None
+        self.mongo_db = None
+        self.mysql_connection = None
+        self.mysql_cursor = None
+        self.write_failed = False  # Set when a MongoDB or MySQL write fails, keeping the journal job
+
+    @property
+    def youtube(self):
+        """
+            YouTube API service object of the current thread.
+
+            The googleapiclient Resource is not thread-safe, so every worker thread
+            builds its own client from the stored API key on first use.
+                """
+        client = getattr(self._local, 'youtube', None)
+        if client is None and self.api_key:
+            client = self._build_client(self.api_key)
+            self._local.youtube = client
+        return client
+
+    @youtube.setter
+    def youtube(self, client):
+        self._local.youtube = client
+        self._local.collections = {}
+
+    def authenticate(self, api_key, daily_budget_per_key=DEFAULT_DAILY_QUOTA):
+        """
+            Authenticates with the YouTube API using the provided API key.
+
+            :param api_key: A string representing the YouTube API key for authentication,
+                or a list (or comma separated string) of keys to rotate between.
+            :param daily_budget_per_key: Quota units each key may spend in this run.
+            :return: An authenticated YouTube API service object.
+                """
+        api_keys = api_key.split(',') if isinstance(api_key, str) else list(api_key)
+        api_keys = [key.strip() for key in api_keys if key.strip()]
+        self.key_pool = ApiKeyPool(api_keys, daily_budget_per_key)
+        self.api_key = self.key_pool.api_keys[0]
+        self._local = threading.local()
+        self.youtube = self._build_client(self.api_key)
+
+    def _client_for(self, api_key):
+        """
+            Returns the current thread's YouTube API service object for api_key.
+                """
+        if api_key is None:
+            return self.youtube
+        clients = getattr(self._local, 'clients', None)
+        if clients is None:
+            clients = self._local.clients = {}
+        if api_key == self.api_key and getattr(self._local, 'youtube', None) is not None:
+            return self._local.youtube
+        if api_key not in clients:
+            clients[api_key] = self._build_client(api_key)
+        return clients[api_key]
+
+    def enable_response_cache(self, path=".youtube_cache.sqlite", max_bytes=512 * 1024 * 1024, ttls=None):
+        """
+            Layers a persistent on-disk response cache under the YouTube API clients.
+
+            Args:
+                path (str): The SQLite file holding the cached responses.
+                max_bytes (int): Maximum total size of cached bodies before LRU eviction.
+                ttls (dict): Per-resource freshness overrides in seconds.
+                    """
+        if self.response_cache is None or self.response_cache.path != path:
+            self.response_cache = ResponseCache(path, max_bytes, ttls)
+        self._local = threading.local()
+
+    def enable_channel_cache(self, path=".channel_ids.sqlite"):
+        """
+            Persists resolved channel names and handles so later runs skip their lookup.
+
+            Args:
+                path (str): The SQLite file holding the cache.
+                    """
+        if self.channel_cache is None or self.channel_cache.path != path:
+            self.channel_cache = ChannelIdCache(path)
+
+    def enable_journal(self, path=".harvest_journal.sqlite"):
+        """
+            Persists harvest progress in a job journal so interrupted harvests can resume.
+
+            Args:
+                path (str): The SQLite file holding the journal.
+                    """
+        if self.journal is None or self.journal.path != path:
+            self.journal = HarvestJournal(path)
+
+    def _journal_get(self, key):
+        if self.journal is None or self.journal.job_id is None:
+            return None
+        return self.journal.get(key)
+
+    def _journal_put(self, key, value):
+        if self.journal is not None and self.journal.job_id is not None:
+            self.journal.put(key, value)
+
+    def _journal_pages(self, key):
+        if self.journal is None or self.journal.job_id is None:
+            return []
+        return self.journal.pages(key)
+
+    def _journal_append(self, key, page_index, value):
+        if self.journal is not None and self.journal.job_id is not None:
+            self.journal.append(key, page_index, value)
+
+    def _journaled(self, key, fetch):
+        """
+            Returns the journaled result of key if the current job already fetched it,
+            otherwise calls fetch and journals a non-empty result.
+                """
+        if self.journal is None or self.journal.job_id is None:
+            return fetch()
+        value = self.journal.get(key)
+        if value is not None:
+            return value
+        value = fetch()
+        if value:
+            self.journal.put(key, value)
+        return value
+
+    def _start_journal_job(self, channel_names, checkpoints):
+        if self.journal is not None:
+            recovered = self.journal.start(channel_names, incremental=bool(checkpoints))
+            if recovered:
+                print(f"Resuming interrupted harvest from {recovered} journal entries.")
+
+    @property
+    def max_workers(self):
+        """
+            Bound on the API requests in flight across all worker threads.
+                """
+        return self._max_workers
+
+    @max_workers.setter
+    def max_workers(self, max_workers):
+        with self._fan_out_lock:
+            self._max_workers = max_workers
+            self._request_slots = threading.BoundedSemaphore(max_workers)
+            if self._fan_out_executor is not None:
+                self._fan_out_executor.shutdown(wait=False)
+                self._fan_out_executor = None
+
+    def _fan_out_pool(self):
+        """
+            Returns the thread pool shared by every fan-out of the analyzer. Its threads
+            live as long as the analyzer, so their API clients and connections are reused.
+                """
+        with self._fan_out_lock:
+            if self._fan_out_executor is None:
+                self._fan_out_executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                             thread_name_prefix='fan-out',
+                                                             initializer=_mark_fan_out_worker)
+            return self._fan_out_executor
+
+    def _fan_out_inline(self):
+        """
+            Whether fan-outs run sequentially: with one worker, or inside a thread of the
+            shared pool, where waiting for the pool could deadlock it.
+                """
+        return self.max_workers <= 1 or getattr(_fan_out_worker, 'active', False)
+
+    def _build_client(self, api_key):
+        """
+            Builds a YouTube API service object, routed through the response cache if enabled.
+                """
+        document = get_youtube_discovery_document(self.discovery_document_path)
+        if self.response_cache is not None:
+            return discovery.build_from_document(document, developerKey=api_key, http=CachingHttp(self.response_cache))
+        return discovery.build_from_document(document, developerKey=api_key)
+
+    def _describes_parameter(self, resource, method, parameter):
+        """
+            Whether the discovery document the clients are built from describes parameter
+            of resource.method, e.g. forHandle of channels.list.
+                """
+        document = get_youtube_discovery_document(self.discovery_document_path)
+        method_description = document['resources'][resource]['methods'][method]
+        return parameter in method_description.get('parameters', {})
+
+    def _collection_for(self, api_key, resource):
+        """
+            Returns the current thread's collection object of resource, e.g. videos(),
+            for api_key. googleapiclient rebuilds all methods of a collection whenever
+            it is accessed, so each is built once per thread and key.
+                """
+        collections = getattr(self._local, 'collections', None)
+        if collections is None:
+            collections = self._local.collections = {}
+        if (api_key, resource) not in collections:
+            collections[api_key, resource] = getattr(self._client_for(api_key), resource)()
+        return collections[api_key, resource]
+
+    def _cached_response(self, request):
+        """
+            Decodes the fresh response cached for request, or returns None if there is none.
+                """
+        cached = self.response_cache.get(self.response_cache.cache_key(request.uri))
+        if cached is None or not cached[3]:
+            return None
+        self.response_cache.hits += 1
+        self.metrics.increment('api_cache_hits')
+        return request.postproc(httplib2.Response(cached[0]), cached[1])
+
+    def _call(self, endpoint, **params):
+        """
+            Sends a YouTube API request through the request scheduler.
+
+            Args:
+                endpoint (str): The resource and method, e.g. 'videos.list'.
+                **params: The request parameters.
+
+            Returns:
+                dict: The decoded response.
+                    """
+        resource, method = endpoint.split('.')
+        if not self.use_field_masks:
+            params.pop('fields', None)
+
+        def build_request(api_key):
+            return getattr(self._collection_for(api_key, resource), method)(**params)
+
+        # Fresh cached responses cost no quota, so they are served before the scheduler
+        # reserves any; the API key is not part of the cache key
+        if self.response_cache is not None:
+            response = self._cached_response(build_request(self.api_key))
+            if response is not None:
+                return response
+
+        # Channel threads and fan-out threads share max_workers request slots
+        with self._request_slots:
+            return self.scheduler.execute(endpoint, build_request, self.key_pool)
+
+    @asynccontextmanager
+    async def async_transport(self, max_concurrency=None, http2=True, transport=None):
+        """
+            Opens an AsyncYouTubeTransport for the *_async fetchers of the analyzer and
+            closes it on exit. Requests keep the quota budget, key rotation and retries
+            of the request scheduler.
+
+            Args:
+                max_concurrency (int): Maximum number of requests in flight. Defaults to
+                    the analyzer's max_concurrency.
+                http2 (bool): Whether to negotiate HTTP/2.
+                transport (httpx.AsyncBaseTransport): Replaces the network transport.
+                    """
+        if max_concurrency is not None:
+            self.max_concurrency = max(1, int(max_concurrency))
+        async with AsyncYouTubeTransport(self.max_concurrency, http2, transport=transport) as async_transport:
+            self._async_transport = async_transport
+            try:
+                yield async_transport
+            finally:
+                self._async_transport = None
+
+    async def _call_async(self, endpoint, **params):
+        """
+            Sends a YouTube API request through the async transport and the request scheduler.
+
+            Args:
+                endpoint (str): The resource and method, e.g. 'videos.list'.
+                **params: The request parameters.
+
+            Returns:
+                dict: The decoded response.
+                    """
+        if self._async_transport is None:
+            raise RuntimeError("No async transport is open; use 'async with analyzer.async_transport()'.")
+        resource = endpoint.split('.')[0]
+        if not self.use_field_masks:
+            params.pop('fields', None)
+        async_transport = self._async_transport
+
+        async def send(api_key):
+            return await async_transport.send(resource, params, api_key)
+
+        return await self.scheduler.execute_async(endpoint, send, self.key_pool)
+
+    async def _journaled_async(self, key, fetch):
+        """
+            Async counterpart of _journaled; fetch is a coroutine function.
+                """
+        value = self._journal_get(key)
+        if value is not None:
+            return value
+        value = await fetch()
+        if value:
+            self._journal_put(key, value)
+        return value
+
+    def configure_comments(self, limit=100, order="relevance", expand_replies=False):
+        """
+            Configures comment harvesting.
+
+            Args:
+                limit (int): Maximum number of top-level comments per video; None or 0 for unlimited.
+                order (str): 'relevance' or 'time'.
+                expand_replies (bool): Whether replies to comment threads are harvested too.
+                    """
+        if order not in ('relevance', 'time'):
+            raise ValueError(f"Unsupported comment order: {order}")
+        self.comment_limit = limit or None
+        self.comment_order = order
+        self.expand_replies = expand_replies
+
+    def _fan_out(self, func, items):
+        """
+            Applies func to every item, using the shared thread pool when more than one
+            worker is configured. Results are returned in the order of items.
+                """
+        return list(self._fan_out_iter(func, items))
+
+    def _fan_out_iter(self, func, items):
+        """
+            Lazily applies func to every item and yields the results in the order of items.
+
+            At most twice max_workers calls are in flight, so a slow consumer holds back
+            the producers instead of letting finished results pile up in memory.
+                """
+        if self._fan_out_inline():
+            for item in items:
+                yield func(item)
+            return
+        executor = self._fan_out_pool()
+        pending = deque()
+        try:
+            for item in items:
+                pending.append(executor.submit(func, item))
+                if len(pending) >= self.max_workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _fan_out_stream(self, func, items):
+        """
+            Runs the generator func(item) for every item on up to max_workers threads and
+            yields the values of all generators as they are produced.
+
+            Values travel through a bounded queue, so producers wait while the consumer
+            is busy. An exception raised by any generator is re-raised to the consumer.
+            Items are submitted one by one as workers free up, and once the consumer
+            stops, no further item is started.
+                """
+        if self._fan_out_inline():
+            for item in items:
+                yield from func(item)
+            return
+
+        values = queue.Queue(maxsize=self.max_workers * 2)
+        stop = threading.Event()
+        finished = object()
+
+        def put(value):
+            while not stop.is_set():
+                try:
+                    values.put(value, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def run(item):
+            if stop.is_set():
+                return
+            try:
+                for value in func(item):
+                    if not put(value):
+                        return
+            except Exception as e:
+                put(_Failure(e))
+
+        def run_all():
+            executor = self._fan_out_pool()
+            pending = set()
+            try:
+                for item in items:
+                    if stop.is_set():
+                        break
+                    pending.add(executor.submit(run, item))
+                    if len(pending) >= self.max_workers:
+                        pending = wait(pending, return_when=FIRST_COMPLETED).not_done
+            except Exception as e:
+                put(_Failure(e))
+            finally:
+                if stop.is_set():
+                    for future in pending:
+                        future.cancel()
+                wait(pending)
+                put(finished)
+
+        feeder = threading.Thread(target=run_all, daemon=True)
+        feeder.start()
+        try:
+            while True:
+                value = values.get()
+                if value is finished:
+                    break
+                if isinstance(value, _Failure):
+                    raise value.error
+                yield value
+        finally:
+            stop.set()
+            feeder.join()
+
+    @timed_stage('channel_lookup')
+    def get_channel_id(self, channel_name):
+        """
+            Retrieves channel id from YouTube based on the channel name.
+                """
+        try:
+            response = self._call(
+                "search.list",
+                part="id",
+                fields=RESPONSE_FIELDS['channel_search'],
+                q=channel_name,
+                type="channel",
+                maxResults=1
+            )
+            if 'items' in response:
+                channel_id = response['items'][0]['id']['channelId']
+                return channel_id
+            return None
+        except HttpError as e:
+            print("An error occurred:", e)
+            return None
+
+    @timed_stage('channel_lookup')
+    async def get_channel_id_async(self, channel_name):
+        """
+            Async variant of get_channel_id.
+                """
+        try:
+            response = await self._call_async("search.list", part="id", fields=RESPONSE_FIELDS['channel_search'],
+                                              q=channel_name, type="channel", maxResults=1)
+        except HttpError as e:
+            print("An error occurred:", e)
+            return None
+        items = response.get('items') or []
+        return items[0]['id']['channelId'] if items else None
+
+    def get_channel_details(self, channel_id):
+        """
+            Retrieves channel details from YouTube based on the provided query.
+                """
+        return self.get_channels_details([channel_id]).get(channel_id)
+
+    async def get_channel_details_async(self, channel_id):
+        """
+            Async variant of get_channel_details.
+                """
+        return (await self.get_channels_details_async([channel_id])).get(channel_id)
+
+    @timed_stage('channel_lookup')
+    def get_channels_details(self, channel_ids, missing=None):
+        """
+            Retrieves the details of many channels with one channels().list call per
+            50 ids, uploads playlist included.
+
+            Args:
+                channel_ids (list): The channel ids.
+                missing (set): If given, receives the ids the API reported no channel for.
+                    Ids of failed requests are not added.
+
+            Returns:
+                dict: Channel details by channel id; unknown channels are left out.
+                    """
+        channel_ids = list(dict.fromkeys(channel_id for channel_id in channel_ids if channel_id))
+        details = {}
+        for start in range(0, len(channel_ids), CHANNEL_BATCH_SIZE):
+            batch = channel_ids[start:start + CHANNEL_BATCH_SIZE]
+            try:
+                response = self._call(
+                    "channels.list",
+                    part="snippet,statistics,status,contentDetails",
+                    fields=RESPONSE_FIELDS['channel_details'],
+                    id=','.join(batch),
+                    maxResults=CHANNEL_BATCH_SIZE
+                )
+            except HttpError as e:
+                print("An error occurred:", e)
+                continue
+            for item in response.get('items', []):
+                details[item['id']] = self._channel_info(item)
+            if missing is not None:
+                missing.update(channel_id for channel_id in batch if channel_id not in details)
+        return details
+
+    @timed_stage('channel_lookup')
+    async def get_channels_details_async(self, channel_ids):
+        """
+            Async variant of get_channels_details, requesting all batches of 50 ids at once.
+                """
+        channel_ids = list(dict.fromkeys(channel_id for channel_id in channel_ids if channel_id))
+
+        async def fetch(batch):
+            try:
+                return await self._call_async("channels.list", part="snippet,statistics,status,contentDetails",
+                                              fields=RESPONSE_FIELDS['channel_details'], id=','.join(batch),
+                                              maxResults=CHANNEL_BATCH_SIZE)
+            except HttpError as e:
+                print("An error occurred:", e)
+                return {}
+
+        responses = await asyncio.gather(*(fetch(channel_ids[start:start + CHANNEL_BATCH_SIZE])
+                                           for start in range(0, len(channel_ids), CHANNEL_BATCH_SIZE)))
+        return {item['id']: self._channel_info(item)
+                for response in responses for item in response.get('items', [])}
+
+    @staticmethod
+    def _channel_info(item):
+        """
+            Converts a channel resource to the stored channel document.
+                """
+        return {
+            'channel_id': item['id'],
+            'channel_name': item['snippet']['title'],
+            'channel_type': item['snippet'].get('channelType', 'N/A'),
+            'channel_status': item['status'].get('privacyStatus', 'N/A'),
+            'video_count': item['statistics'].get('videoCount'),
+            'view_count': item['statistics'].get('viewCount'),
+            'subs_count': item['statistics'].get('subscriberCount'),
+            'publish_date': item['snippet'].get('publishedAt'),
+            'description': item['snippet'].get('description', 'N/A'),
+            'hidden_subs_count': item['statistics'].get('hiddenSubscriberCount', False),
+            'uploads_playlist_id': item.get('contentDetails', {})
+                                       .get('relatedPlaylists', {}).get('uploads')
+        }
+
+    @staticmethod
+    def parse_channel_reference(channel_name):
+        """
+            Classifies what the user typed as a channel.
+
+            Returns:
+                tuple: ('id', channel id) for channel ids and /channel/ URLs, ('handle',
+                    '@handle') for handles and /@handle URLs, else ('name', channel name).
+                    """
+        reference = channel_name.strip()
+        match = CHANNEL_URL_PATTERN.match(reference)
+        if match:
+            return ('id', match.group(1)) if match.group(1) else ('handle', match.group(2))
+        if CHANNEL_ID_PATTERN.match(reference):
+            return 'id', reference
+        if reference.startswith('@') and ' ' not in reference:
+            return 'handle', reference
+        return 'name', reference
+
+    @timed_stage('channel_lookup')
+    def get_channel_id_for_handle(self, handle):
+        """
+            Resolves an @handle with channels().list(forHandle=...) for 1 quota unit.
+                """
+        if not self._describes_parameter('channels', 'list', 'forHandle'):
+            # Discovery documents older than the forHandle parameter reject it
+            return self.get_channel_id(handle)
+        try:
+            response = self._call("channels.list", part="id", fields=RESPONSE_FIELDS['channel_handle'],
+                                  forHandle=handle)
+        except HttpError as e:
+            print("An error occurred:", e)
+            return None
+        items = response.get('items') or []
+        return items[0]['id'] if items else None
+
+    @timed_stage('channel_lookup')
+    async def get_channel_id_for_handle_async(self, handle):
+        """
+            Async variant of get_channel_id_for_handle.
+                """
+        try:
+            response = await self._call_async("channels.list", part="id", fields=RESPONSE_FIELDS['channel_handle'],
+                                              forHandle=handle)
+        except HttpError as e:
+            print("An error occurred:", e)
+            return None
+        items = response.get('items') or []
+        return items[0]['id'] if items else None
+
+    def resolve_channel_ids(self, channel_names):
+        """
+            Resolves channel names, @handles, channel URLs and channel ids to channel ids.
+
+            Ids are used as given, cached references are read from the channel cache,
+            handles cost 1 quota unit and only the remaining names are searched for
+            (100 units). Results are kept for the analyzer's lifetime and, with
+            enable_channel_cache, across runs.
+
+            Returns:
+                dict: The channel id, or None if not found, of every channel name.
+                    """
+        resolved = {}
+        for channel_name in dict.fromkeys(channel_names):
+            if not channel_name:
+                continue
+            if channel_name in self._channel_ids:
+                resolved[channel_name] = self._channel_ids[channel_name]
+                continue
+            kind, reference = self.parse_channel_reference(channel_name)
+            if kind == 'id':
+                channel_id = reference
+            else:
+                channel_id = self.channel_cache.get(reference) if self.channel_cache is not None else None
+                if channel_id is None:
+                    if kind == 'handle':
+                        channel_id = self.get_channel_id_for_handle(reference)
+                    else:
+                        channel_id = self.get_channel_id(reference)
+                    if channel_id and self.channel_cache is not None:
+                        self.channel_cache.put(reference, channel_id)
+            self._channel_ids[channel_name] = channel_id
+            resolved[channel_name] = channel_id
+        return resolved
+
+    def prefetch_channels(self, channel_names):
+        """
+            Resolves all channels and fetches their details in one batched call, ahead of
+            harvesting them one by one.
+                """
+        # Channels the journal already resolved keep their journaled id
+        channel_ids = [self._journal_get(f"channel_id:{channel_name}") for channel_name in channel_names]
+        try:
+            resolved = self.resolve_channel_ids(
+                channel_name for channel_name, channel_id in zip(channel_names, channel_ids) if not channel_id)
+            missing = set()
+            self._channel_details.update(self.get_channels_details(
+                list(resolved.values()) + [channel_id for channel_id in channel_ids if channel_id], missing))
+            # Unknown channels are remembered so they are not looked up again one by one
+            self._channel_details.update(dict.fromkeys(missing))
+        except QuotaBudgetExceeded as e:
+            # The channels are harvested one by one and report the exhausted quota themselves
+            print(f"Could not prefetch channel details: {e}")
+
+    @timed_stage('playlist_paging', count_rows=True)
+    def get_all_playlist_ids(self, channel_id, etags=None):
+        """
+            Retrieves playlist id from YouTube based on the provided channel name.
+
+            If an etags dict is given it is filled with the etag of every playlist,
+            which changes whenever the playlist's title or item count changes.
+                """
+        playlists_info = []
+        next_page_token = None
+        while True:
+            try:
+                response = self._call(
+                    "playlists.list",
+                    part="snippet,contentDetails",
+                    fields=RESPONSE_FIELDS['playlists'],
+                    channelId=channel_id,
+                    maxResults=50,
+                    pageToken=next_page_token
+                )
+                if 'items' in response:
+                    playlists_info.extend(self._playlist_records(channel_id, response, etags))
+                    next_page_token = response.get('nextPageToken')
+                    if not next_page_token:
+                        break
+                else:
+                    break
+            except HttpError as e:
+                print("An error occurred:", e)
+                break
+        return playlists_info
+
+    @timed_stage('playlist_paging', count_rows=True)
+    async def get_all_playlist_ids_async(self, channel_id, etags=None):
+        """
+            Async variant of get_all_playlist_ids.
+                """
+        playlists_info = []
+        next_page_token = None
+        while True:
+            try:
+                response = await self._call_async("playlists.list", part="snippet,contentDetails",
+                                                  fields=RESPONSE_FIELDS['playlists'], channelId=channel_id,
+                                                  maxResults=50, pageToken=next_page_token)
+            except HttpError as e:
+                print("An error occurred:", e)
+                break
+            playlists_info.extend(self._playlist_records(channel_id, response, etags))
+            next_page_token = response.get('nextPageToken')
+            if not next_page_token:
+                break
+        return playlists_info
+
+    @staticmethod
+    def _playlist_records(channel_id, response, etags=None):
         """
-            Initializes the Resource object.
+            Converts a playlists().list page to playlist documents, recording the etag
+            of every playlist in etags if given.
+                """
+        playlists_info = []
+        for item in response.get('items', []):
+            playlists_info.append({
+                'channel_id': channel_id,
+                'playlist_id': item['id'],
+                'playlist_name': item['snippet']['title']
+            })
+            if etags is not None:
+                etags[item['id']] = item.get('etag')
+        return playlists_info
+
+    def video_ids_from_playlist(self, playlist_ids):
+        """
+            Retrieves video ids from a playlist on YouTube based on the provided playlist ID.
                 """
+        video_ids = {}
+        for playlist_video_ids in self._fan_out(self._video_ids_from_single_playlist, playlist_ids):
+            video_ids.update(dict.fromkeys(playlist_video_ids))
+        return list(video_ids)
 
-        self.youtube = None
-        self.mongo_client = None
-        self.mongo_db = None
-        self.mysql_connection = None
-        self.mysql_cursor = None
+    async def video_ids_from_playlist_async(self, playlist_ids):
+        """
+            Async variant of video_ids_from_playlist, paging through all playlists at once.
+                """
+        video_ids = {}
+        for playlist_video_ids in await asyncio.gather(*(self._video_ids_from_single_playlist_async(playlist_id)
+                                                         for playlist_id in playlist_ids)):
+            video_ids.update(dict.fromkeys(playlist_video_ids))
+        return list(video_ids)
 
-    def authenticate(self, api_key):
+    @timed_stage('playlist_paging', count_rows=True)
+    def _video_ids_from_single_playlist(self, playlist_id, published_after=None):
         """
-            Authenticates with the YouTube API using the provided API key.
+            Pages through a single playlist and returns the ids of its videos.
 
-            :param api_key: A string representing the YouTube API key for authentication.
-            :return: An authenticated YouTube API service object.
+            With published_after ('YYYY-MM-DDTHH:MM:SSZ'), paging stops at the first video
+            published at or before that time, which suits the newest-first uploads playlist.
+                """
+        # Resume from the last page token recorded in the journal, which holds every
+        # fetched page with its own video ids
+        journal_key = f"playlist:{playlist_id}:{published_after}"
+        pages = self._journal_pages(journal_key)
+        video_ids = [video_id for page in pages for video_id in page['video_ids']]
+        if pages and not pages[-1]['page_token']:
+            return video_ids
+        next_page_token = pages[-1]['page_token'] if pages else None
+        page_index = len(pages)
+        while next_page_token is not False:
+            try:
+                response = self._call(
+                    "playlistItems.list",
+                    part="contentDetails",
+                    fields=RESPONSE_FIELDS['playlist_items'],
+                    playlistId=playlist_id,
+                    maxResults=50,
+                    pageToken=next_page_token
+                )
+                if 'items' in response:
+                    page_video_ids, next_page_token = self._playlist_item_page(response, published_after)
+                    video_ids.extend(page_video_ids)
+                    self._journal_append(journal_key, page_index,
+                                         {'video_ids': page_video_ids, 'page_token': next_page_token})
+                    page_index += 1
+                    if not next_page_token:
+                        break
+                else:
+                    break
+            except HttpError as e:
+                print("An error occurred:", e)
+                break
+        return video_ids
+
+    @timed_stage('playlist_paging', count_rows=True)
+    async def _video_ids_from_single_playlist_async(self, playlist_id, published_after=None):
+        """
+            Async variant of _video_ids_from_single_playlist, journaled the same way.
                 """
-        self.youtube = googleapiclient.discovery.build("youtube", "v3", developerKey=api_key)
+        journal_key = f"playlist:{playlist_id}:{published_after}"
+        pages = self._journal_pages(journal_key)
+        video_ids = [video_id for page in pages for video_id in page['video_ids']]
+        if pages and not pages[-1]['page_token']:
+            return video_ids
+        next_page_token = pages[-1]['page_token'] if pages else None
+        page_index = len(pages)
+        while next_page_token is not False:
+            try:
+                response = await self._call_async("playlistItems.list", part="contentDetails",
+                                                  fields=RESPONSE_FIELDS['playlist_items'], playlistId=playlist_id,
+                                                  maxResults=50, pageToken=next_page_token)
+            except HttpError as e:
+                print("An error occurred:", e)
+                break
+            if 'items' not in response:
+                break
+            page_video_ids, next_page_token = self._playlist_item_page(response, published_after)
+            video_ids.extend(page_video_ids)
+            self._journal_append(journal_key, page_index, {'video_ids': page_video_ids, 'page_token': next_page_token})
+            page_index += 1
+            if not next_page_token:
+                break
+        return video_ids
 
-    def get_channel_id(self, channel_name):
+    @staticmethod
+    def _playlist_item_page(response, published_after=None):
         """
-            Retrieves channel id from YouTube based on the channel name.
+            Extracts the video ids of a playlistItems().list page.
+
+            With published_after, entries without a publish time, e.g. private or deleted
+            videos, are skipped instead of ending the page.
+
+            Returns:
+                tuple: The video ids and the next page token, which is False once a video
+                    published at or before published_after is reached.
+                    """
+        video_ids = []
+        for item in response.get('items', []):
+            if published_after:
+                published_at = item['contentDetails'].get('videoPublishedAt')
+                if not published_at:
+                    continue
+                if published_at <= published_after:
+                    return video_ids, False
+            video_ids.append(item['contentDetails']['videoId'])
+        return video_ids, response.get('nextPageToken')
+
+    @timed_stage('channel_lookup')
+    def get_uploads_playlist_id(self, channel_id):
+        """
+            Retrieves the id of the playlist holding every upload of the channel.
                 """
         try:
-            request = self.youtube.search().list(
-                part="id",
-                q=channel_name,
-                type="channel",
-                maxResults=1
+            response = self._call(
+                "channels.list",
+                part="contentDetails",
+                fields=RESPONSE_FIELDS['uploads_playlist'],
+                id=channel_id
             )
-            response = request.execute()
-            if 'items' in response:
-                channel_id = response['items'][0]['id']['channelId']
-                return channel_id
+            if response.get('items'):
+                return response['items'][0]['contentDetails']['relatedPlaylists'].get('uploads')
             return None
         except HttpError as e:
             print("An error occurred:", e)
             return None
 
-    def get_channel_details(self, channel_id):
+    @timed_stage('channel_lookup')
+    async def get_uploads_playlist_id_async(self, channel_id):
         """
-            Retrieves channel details from YouTube based on the provided query.
+            Async variant of get_uploads_playlist_id.
                 """
         try:
-            request = self.youtube.channels().list(
-                part="snippet,statistics,status",
-                id=channel_id
-            )
-            response = request.execute()
-            if 'items' in response:
-                item = response['items'][0]
-                channel_info = {
-                    'channel_id': channel_id,
-                    'channel_name': item['snippet']['title'],
-                    'channel_type': item['snippet'].get('channelType', 'N/A'),
-                    'channel_status': item['status'].get('privacyStatus', 'N/A'),
-                    'video_count': item['statistics'].get('videoCount', 'N/A'),
-                    'view_count': item['statistics'].get('viewCount', 'N/A'),
-                    'subs_count': item['statistics'].get('subscriberCount', 'N/A'),
-                    'publish_date': item['snippet'].get('publishedAt', 'N/A')
-                                                   .split('T')[0].replace('-', ''),
-                    'description': item['snippet'].get('description', 'N/A'),
-                    'hidden_subs_count': item['statistics'].get('hiddenSubscriberCount', False)
-                }
-                return channel_info
-            return None
+            response = await self._call_async("channels.list", part="contentDetails",
+                                              fields=RESPONSE_FIELDS['uploads_playlist'], id=channel_id)
         except HttpError as e:
             print("An error occurred:", e)
             return None
+        if response.get('items'):
+            return response['items'][0]['contentDetails']['relatedPlaylists'].get('uploads')
+        return None
 
-    def get_all_playlist_ids(self, channel_id):
+    def video_ids_from_uploads(self, uploads_playlist_id, published_after=None):
         """
-            Retrieves playlist id from YouTube based on the provided channel name.
+            Retrieves every video id of a channel by paging through its uploads playlist.
+
+            playlistItems().list costs 1 quota unit per 50 videos and covers the whole
+            catalogue, unlike search().list which costs 100 units per page and stops
+            at about 500 results. With published_after only newer uploads are returned.
                 """
-        playlists_info = []
+        return self._video_ids_from_single_playlist(uploads_playlist_id, published_after)
+
+    async def video_ids_from_uploads_async(self, uploads_playlist_id, published_after=None):
+        """
+            Async variant of video_ids_from_uploads.
+                """
+        return await self._video_ids_from_single_playlist_async(uploads_playlist_id, published_after)
+
+    def video_ids_from_channel(self, channel_id, uploads_playlist_id=None, published_after=None):
+        """
+            Retrieves videos from YouTube directly from channel where videos without playlist.
+
+            The channel's uploads playlist is enumerated when available; search().list is
+            only used as a fallback for channels without one.
+                """
+        if uploads_playlist_id is None:
+            uploads_playlist_id = self.get_uploads_playlist_id(channel_id)
+        if uploads_playlist_id:
+            return self.video_ids_from_uploads(uploads_playlist_id, published_after)
+        return self._video_ids_from_search(channel_id)
+
+    async def video_ids_from_channel_async(self, channel_id, uploads_playlist_id=None, published_after=None):
+        """
+            Async variant of video_ids_from_channel.
+                """
+        if uploads_playlist_id is None:
+            uploads_playlist_id = await self.get_uploads_playlist_id_async(channel_id)
+        if uploads_playlist_id:
+            return await self.video_ids_from_uploads_async(uploads_playlist_id, published_after)
+        return await self._video_ids_from_search_async(channel_id)
+
+    @timed_stage('playlist_paging', count_rows=True)
+    def _video_ids_from_search(self, channel_id):
+        """
+            Retrieves video ids of a channel through search().list.
+                """
+        video_ids = {}
         next_page_token = None
         while True:
             try:
-                request = self.youtube.playlists().list(
-                    part="snippet",
+                response = self._call(
+                    "search.list",
+                    part="id",
+                    fields=RESPONSE_FIELDS['video_search'],
                     channelId=channel_id,
+                    type="video",
                     maxResults=50,
                     pageToken=next_page_token
                 )
-                response = request.execute()
                 if 'items' in response:
                     for item in response['items']:
-                        playlist_info = {
-                            'channel_id': channel_id,
-                            'playlist_id': item['id'],
-                            'playlist_name': item['snippet']['title']
-                        }
-                        playlists_info.append(playlist_info)
+                        video_ids[item['id']['videoId']] = None
                     next_page_token = response.get('nextPageToken')
                     if not next_page_token:
                         break
@@ -114,290 +2565,848 @@ class YouTubeChannelAnalyzer:
             except HttpError as e:
                 print("An error occurred:", e)
                 break
-        return playlists_info
+        return list(video_ids)
 
-    def video_ids_from_playlist(self, playlist_ids):
+    @timed_stage('playlist_paging', count_rows=True)
+    async def _video_ids_from_search_async(self, channel_id):
         """
-            Retrieves video ids from a playlist on YouTube based on the provided playlist ID.
+            Async variant of _video_ids_from_search.
                 """
-        video_ids = set()
-        for playlist_id in playlist_ids:
-            next_page_token = None
-            while True:
-                try:
-                    request = self.youtube.playlistItems().list(
-                        part="contentDetails",
-                        playlistId=playlist_id,
-                        maxResults=50,
-                        pageToken=next_page_token
-                    )
-                    response = request.execute()
-                    if 'items' in response:
-                        for item in response['items']:
-                            video_id = item['contentDetails']['videoId']
-                            video_ids.add(video_id)
-                        next_page_token = response.get('nextPageToken')
-                        if not next_page_token:
-                            break
-                    else:
-                        break
-                except HttpError as e:
-                    print("An error occurred:", e)
-                    break
+        video_ids = {}
+        next_page_token = None
+        while True:
+            try:
+                response = await self._call_async("search.list", part="id", fields=RESPONSE_FIELDS['video_search'],
+                                                  channelId=channel_id, type="video", maxResults=50,
+                                                  pageToken=next_page_token)
+            except HttpError as e:
+                print("An error occurred:", e)
+                break
+            video_ids.update(dict.fromkeys(item['id']['videoId'] for item in response.get('items', [])))
+            next_page_token = response.get('nextPageToken')
+            if not next_page_token:
+                break
         return list(video_ids)
 
-    def video_ids_from_channel(self, channel_id):
+    def get_video_details(self, video_ids, channel_id):
         """
-            Retrieves videos from YouTube directly from channel where videos without playlist.
+        Retrieves video details from YouTube from both directly from channel and playlists.
+
+        Video ids are requested in batches of up to 50 per videos().list call. Ids the API
+        does not return are reported, and a failed batch does not stop the remaining ones.
+        """
+        video_details = []
+        for batch_details in self.iter_video_details(video_ids, channel_id):
+            video_details.extend(batch_details)
+        return video_details
+
+    async def get_video_details_async(self, video_ids, channel_id):
+        """
+            Async variant of get_video_details, requesting all batches of 50 ids at once.
+                """
+        video_ids = list(video_ids)
+
+        def fetch(batch):
+            return self._journaled_async(HarvestJournal.batch_key('videos', channel_id, batch),
+                                         lambda: self._fetch_video_batch_async(batch, channel_id))
+
+        batches = await asyncio.gather(*(fetch(video_ids[start:start + VIDEO_BATCH_SIZE])
+                                         for start in range(0, len(video_ids), VIDEO_BATCH_SIZE)))
+        return [video for batch_details in batches for video in batch_details]
+
+    def iter_video_details(self, video_ids, channel_id):
+        """
+            Yields the details of video_ids as one list per videos().list batch.
+                """
+        video_ids = list(video_ids)
+        batches = (video_ids[start:start + VIDEO_BATCH_SIZE]
+                   for start in range(0, len(video_ids), VIDEO_BATCH_SIZE))
+        def fetch(batch):
+            return self._journaled(HarvestJournal.batch_key('videos', channel_id, batch),
+                                   lambda: self._fetch_video_batch(batch, channel_id))
+
+        for batch_details in self._fan_out_iter(fetch, batches):
+            if batch_details:
+                yield batch_details
+
+    @timed_stage('video_details', count_rows=True)
+    def _fetch_video_batch(self, batch, channel_id):
+        """
+            Fetches the details of up to 50 videos with a single videos().list call.
+                """
+        try:
+            response = self._call(
+                "videos.list",
+                part="snippet,statistics,contentDetails",
+                fields=RESPONSE_FIELDS['video_details'],
+                id=','.join(batch),
+                maxResults=VIDEO_BATCH_SIZE
+            )
+        except HttpError as e:
+            print(f"An error occurred while fetching videos {batch[0]}..{batch[-1]}:", e)
+            return []
+        return self._video_records(batch, channel_id, response)
+
+    @timed_stage('video_details', count_rows=True)
+    async def _fetch_video_batch_async(self, batch, channel_id):
+        """
+            Async variant of _fetch_video_batch.
+                """
+        try:
+            response = await self._call_async("videos.list", part="snippet,statistics,contentDetails",
+                                              fields=RESPONSE_FIELDS['video_details'], id=','.join(batch),
+                                              maxResults=VIDEO_BATCH_SIZE)
+        except HttpError as e:
+            print(f"An error occurred while fetching videos {batch[0]}..{batch[-1]}:", e)
+            return []
+        return self._video_records(batch, channel_id, response)
+
+    @staticmethod
+    def _video_records(batch, channel_id, response):
+        """
+            Converts a videos().list response to video documents in the order of batch.
+                """
+        # Map returned items back to the requested ids
+        items_by_id = {item['id']: item for item in response.get('items', [])}
+        missing_ids = [video_id for video_id in batch if video_id not in items_by_id]
+        if missing_ids:
+            print(f"Videos not returned by the API (private or deleted): {', '.join(missing_ids)}")
+
+        video_details = []
+        for video_id in batch:
+            item = items_by_id.get(video_id)
+            if item is None:
+                continue
+            # Counters, timestamps and the duration keep their API form for normalize_records
+            title = item['snippet']['title']
+            description = item['snippet'].get('description', 'N/A')
+            published_at = item['snippet'].get('publishedAt')
+            view_count = item['statistics'].get('viewCount')
+            like_count = item['statistics'].get('likeCount')
+            dislike_count = item['statistics'].get('dislikeCount')
+            comment_count = item['statistics'].get('commentCount')
+            favorite_count = item['statistics'].get('favoriteCount')
+            duration = item['contentDetails'].get('duration')
+
+            thumbnail_url = item['snippet']['thumbnails']['default']['url']
+            caption_status = item['contentDetails'].get('caption', 'N/A')
+
+            video_details.append({
+                "channel_id": channel_id,
+                "video_id": video_id,
+                "title": title,
+                "description": description,
+                "published_at": published_at,
+                "view_count": view_count,
+                "like_count": like_count,
+                "dislike_count": dislike_count,
+                "comment_count": comment_count,
+                "favorite_count": favorite_count,
+                "duration": duration,
+                "thumbnail_url": thumbnail_url,
+                "caption_status": caption_status
+            })
+        return video_details
+
+    def refresh_video_statistics(self, video_ids, channel_id=None):
+        """
+            Retrieves the current statistics of already harvested videos in batched
+            videos().list calls of up to 50 ids.
+
+            Args:
+                video_ids (list): The ids of the videos.
+                channel_id (str): The channel the videos belong to, scoping the journal entries.
+
+            Returns:
+                list: One dict per video with its video_id and counters.
+                    """
+        video_statistics = []
+        for batch_statistics in self.iter_video_statistics(video_ids, channel_id):
+            video_statistics.extend(batch_statistics)
+        return video_statistics
+
+    async def refresh_video_statistics_async(self, video_ids, channel_id=None):
+        """
+            Async variant of refresh_video_statistics, requesting all batches of 50 ids at once.
+                """
+        video_ids = list(video_ids)
+
+        def fetch(batch):
+            return self._journaled_async(HarvestJournal.batch_key('statistics', channel_id, batch),
+                                         lambda: self._fetch_statistics_batch_async(batch))
+
+        batches = await asyncio.gather(*(fetch(video_ids[start:start + VIDEO_BATCH_SIZE])
+                                         for start in range(0, len(video_ids), VIDEO_BATCH_SIZE)))
+        return [statistics for batch_statistics in batches for statistics in batch_statistics]
+
+    def iter_video_statistics(self, video_ids, channel_id=None):
+        """
+            Yields the statistics of video_ids as one list per videos().list batch.
+                """
+        video_ids = list(video_ids)
+        batches = (video_ids[start:start + VIDEO_BATCH_SIZE]
+                   for start in range(0, len(video_ids), VIDEO_BATCH_SIZE))
+        def fetch(batch):
+            return self._journaled(HarvestJournal.batch_key('statistics', channel_id, batch),
+                                   lambda: self._fetch_statistics_batch(batch))
+
+        for batch_statistics in self._fan_out_iter(fetch, batches):
+            if batch_statistics:
+                yield batch_statistics
+
+    @timed_stage('video_statistics', count_rows=True)
+    def _fetch_statistics_batch(self, batch):
+        """
+            Fetches the statistics of up to 50 videos with a single videos().list call.
+                """
+        try:
+            response = self._call(
+                "videos.list",
+                part="statistics",
+                fields=RESPONSE_FIELDS['video_statistics'],
+                id=','.join(batch),
+                maxResults=VIDEO_BATCH_SIZE
+            )
+        except HttpError as e:
+            print(f"An error occurred while refreshing statistics of videos {batch[0]}..{batch[-1]}:", e)
+            return []
+        return self._statistics_records(response)
+
+    @timed_stage('video_statistics', count_rows=True)
+    async def _fetch_statistics_batch_async(self, batch):
+        """
+            Async variant of _fetch_statistics_batch.
+                """
+        try:
+            response = await self._call_async("videos.list", part="statistics",
+                                              fields=RESPONSE_FIELDS['video_statistics'], id=','.join(batch),
+                                              maxResults=VIDEO_BATCH_SIZE)
+        except HttpError as e:
+            print(f"An error occurred while refreshing statistics of videos {batch[0]}..{batch[-1]}:", e)
+            return []
+        return self._statistics_records(response)
+
+    @staticmethod
+    def _statistics_records(response):
+        """
+            Converts a videos().list response of part statistics to statistics documents.
+                """
+        return [{
+            "video_id": item['id'],
+            "view_count": item['statistics'].get('viewCount'),
+            "like_count": item['statistics'].get('likeCount'),
+            "dislike_count": item['statistics'].get('dislikeCount'),
+            "comment_count": item['statistics'].get('commentCount'),
+            "favorite_count": item['statistics'].get('favoriteCount')
+        } for item in response.get('items', [])]
+
+    def get_video_comments(self, video_ids, published_after=None):
+        """
+            Retrieves comments from a video on YouTube based on the provided video ID.
+
+            With published_after ('YYYY-MM-DDTHH:MM:SSZ'), only comments newer than that
+            time are fetched.
+                """
+        video_comments = []
+        for comments in self.iter_video_comments(video_ids, published_after):
+            video_comments.extend(comments)
+        return video_comments
+
+    async def get_video_comments_async(self, video_ids, published_after=None):
+        """
+            Async variant of get_video_comments, reading the comments of all videos at once.
+                """
+        pages = await asyncio.gather(*(self._comment_pages_async(video_id, published_after)
+                                       for video_id in video_ids))
+        return [comment for video_comments in pages for comment in video_comments]
+
+    def iter_video_comments(self, video_ids, published_after=None):
+        """
+            Yields comment batches of video_ids, one per fetched page, as they arrive.
+
+            Videos are fetched concurrently by up to max_workers threads, so batches of
+            different videos may interleave. The number of top-level comments per video,
+            their order and reply expansion follow comment_limit, comment_order and
+            expand_replies.
                 """
-        video_ids = set()
+        for comments in self._fan_out_stream(lambda video_id: self._iter_comment_pages(video_id, published_after),
+                                             video_ids):
+            if comments:
+                yield comments
+
+    def _iter_comment_pages(self, video_id, published_after=None):
+        """
+            Pages through the comment threads of a single video and yields one list of
+            comments per page.
+
+            With published_after the threads are read newest first and paging stops at
+            the first comment published at or before that time. Every page is journaled,
+            so a resumed harvest replays the pages already read and continues from the
+            next page token.
+                """
+        limit = self.comment_limit
+        order = "time" if published_after else self.comment_order
+        journal_prefix = f"comments:{video_id}:{published_after}:{order}:{limit}:{self.expand_replies}"
+        next_page_token = None
+        page_index = 0
+        comment_count = 0  # Counter for the number of top-level comments fetched
+        while limit is None or comment_count < limit:
+            page = self._journal_get(f"{journal_prefix}:{page_index}")
+            if page is None:
+                with self.metrics.stage('comments'):
+                    try:
+                        response = self._call(
+                            "commentThreads.list",
+                            part="snippet,replies" if self.expand_replies else "snippet",
+                            fields=RESPONSE_FIELDS['comment_threads'],
+                            videoId=video_id,
+                            maxResults=COMMENT_PAGE_SIZE if limit is None else min(COMMENT_PAGE_SIZE,
+                                                                                    limit - comment_count),
+                            order=order,
+                            pageToken=next_page_token
+                        )
+                    except HttpError as e:
+                        print(f"An error occurred while fetching comments of video {video_id}:", e)
+                        return
+                    page = self._parse_comment_threads(video_id, response, published_after)
+                self.metrics.add_rows('comments', len(page['comments']))
+                self._journal_put(f"{journal_prefix}:{page_index}", page)
+
+            yield page['comments']
+            comment_count += page['threads']
+            next_page_token = page['next_page_token']
+            page_index += 1
+            if not next_page_token:
+                return
+
+    async def _comment_pages_async(self, video_id, published_after=None):
+        """
+            Async variant of _iter_comment_pages, returning the comments of all pages of
+            the video. Truncated reply threads of a page are read concurrently.
+                """
+        limit = self.comment_limit
+        order = "time" if published_after else self.comment_order
+        journal_prefix = f"comments:{video_id}:{published_after}:{order}:{limit}:{self.expand_replies}"
+        comments = []
+        next_page_token = None
+        page_index = 0
+        comment_count = 0
+        while limit is None or comment_count < limit:
+            page = self._journal_get(f"{journal_prefix}:{page_index}")
+            if page is None:
+                with self.metrics.stage('comments'):
+                    try:
+                        response = await self._call_async(
+                            "commentThreads.list",
+                            part="snippet,replies" if self.expand_replies else "snippet",
+                            fields=RESPONSE_FIELDS['comment_threads'],
+                            videoId=video_id,
+                            maxResults=COMMENT_PAGE_SIZE if limit is None else min(COMMENT_PAGE_SIZE,
+                                                                                    limit - comment_count),
+                            order=order,
+                            pageToken=next_page_token
+                        )
+                    except HttpError as e:
+                        print(f"An error occurred while fetching comments of video {video_id}:", e)
+                        return comments
+                    parent_ids = self._truncated_thread_ids(response, published_after)
+                    replies = await asyncio.gather(*(self._fetch_replies_async(video_id, parent_id)
+                                                     for parent_id in parent_ids))
+                    page = self._parse_comment_threads(video_id, response, published_after,
+                                                       dict(zip(parent_ids, replies)))
+                self.metrics.add_rows('comments', len(page['comments']))
+                self._journal_put(f"{journal_prefix}:{page_index}", page)
+
+            comments.extend(page['comments'])
+            comment_count += page['threads']
+            next_page_token = page['next_page_token']
+            page_index += 1
+            if not next_page_token:
+                break
+        return comments
+
+    def _truncated_thread_ids(self, response, published_after=None):
+        """
+            Returns the ids of the threads of a commentThreads().list page whose replies
+            are not all inline and have to be read with comments().list.
+                """
+        if not self.expand_replies:
+            return []
+        parent_ids = []
+        for item in response.get('items', []):
+            snippet = item['snippet']
+            published_at = snippet['topLevelComment']['snippet'].get('publishedAt')
+            if published_after and published_at and published_at <= published_after:
+                break
+            if snippet.get('totalReplyCount', 0) > len(item.get('replies', {}).get('comments', [])):
+                parent_ids.append(item['id'])
+        return parent_ids
+
+    def _parse_comment_threads(self, video_id, response, published_after=None, replies=None):
+        """
+            Extracts the comments of a commentThreads().list page, expanding replies
+            when enabled. Replies of truncated threads are taken from replies, a dict
+            by thread id, or else read with comments().list.
+
+            Returns:
+                dict: The page's comments, its number of threads and the next page token
+                    (None once paging should stop).
+                    """
+        comments = []
+        threads = 0
+        next_page_token = response.get('nextPageToken')
+        for item in response.get('items', []):
+            top_level_comment = self._comment_record(video_id, item['snippet']['topLevelComment'])
+            published_at = top_level_comment['comment_published_at']
+            if published_after and published_at and published_at <= published_after:
+                next_page_token = None
+                break
+            comments.append(top_level_comment)
+            threads += 1
+
+            if self.expand_replies and item['snippet'].get('totalReplyCount', 0):
+                inline_replies = item.get('replies', {}).get('comments', [])
+                # commentThreads returns at most 5 replies inline; read the rest with comments().list
+                if replies is not None and item['id'] in replies:
+                    comments.extend(replies[item['id']])
+                elif item['snippet']['totalReplyCount'] > len(inline_replies):
+                    comments.extend(self._fetch_replies(video_id, item['id']))
+                else:
+                    comments.extend(self._comment_record(video_id, reply, item['id']) for reply in inline_replies)
+        return {'comments': comments, 'threads': threads, 'next_page_token': next_page_token}
+
+    def _fetch_replies(self, video_id, parent_id):
+        """
+            Retrieves every reply of a comment thread with comments().list.
+                """
+        replies = []
         next_page_token = None
         while True:
             try:
-                request = self.youtube.search().list(
-                    part="id",
-                    channelId=channel_id,
-                    type="video",
-                    maxResults=50,
+                response = self._call(
+                    "comments.list",
+                    part="snippet",
+                    fields=RESPONSE_FIELDS['comments'],
+                    parentId=parent_id,
+                    maxResults=COMMENT_PAGE_SIZE,
                     pageToken=next_page_token
                 )
-                response = request.execute()
-                if 'items' in response:
-                    for item in response['items']:
-                        video_ids.add(item['id']['videoId'])
-                    next_page_token = response.get('nextPageToken')
-                    if not next_page_token:
-                        break
-                else:
-                    break
             except HttpError as e:
-                print("An error occurred:", e)
+                print(f"An error occurred while fetching replies of comment {parent_id}:", e)
                 break
-        return list(video_ids)
+            replies.extend(self._comment_record(video_id, reply, parent_id) for reply in response.get('items', []))
+            next_page_token = response.get('nextPageToken')
+            if not next_page_token:
+                break
+        return replies
+
+    async def _fetch_replies_async(self, video_id, parent_id):
+        """
+            Async variant of _fetch_replies.
+                """
+        replies = []
+        next_page_token = None
+        while True:
+            try:
+                response = await self._call_async("comments.list", part="snippet", fields=RESPONSE_FIELDS['comments'],
+                                                  parentId=parent_id, maxResults=COMMENT_PAGE_SIZE,
+                                                  pageToken=next_page_token)
+            except HttpError as e:
+                print(f"An error occurred while fetching replies of comment {parent_id}:", e)
+                break
+            replies.extend(self._comment_record(video_id, reply, parent_id) for reply in response.get('items', []))
+            next_page_token = response.get('nextPageToken')
+            if not next_page_token:
+                break
+        return replies
+
+    @staticmethod
+    def _comment_record(video_id, comment, parent_id=None):
+        """
+            Converts a comment resource to the stored comment document. Replies carry
+            the id of their thread as parent_id.
+                """
+        record = {
+            "comment_id": comment['id'],
+            "video_id": video_id,
+            "commenter_name": comment['snippet']['authorDisplayName'],
+            "comment_text": comment['snippet']['textDisplay'],
+            "comment_published_at": comment['snippet'].get('publishedAt')
+        }
+        if parent_id is not None:
+            record['parent_id'] = parent_id
+        return record
+
+    def analyze_channels(self, channel_names, max_workers=None, checkpoints=None):
+        """
+            Analyzes the specified YouTube channels.
+
+            Args:
+                channel_names (list): A list of channel names to analyze.
+                max_workers (int): Size of the worker pool used to fetch channels, playlists,
+                    video batches and comments concurrently. Defaults to the analyzer's
+                    max_workers; 1 runs everything sequentially.
+                checkpoints (dict): Harvest checkpoints by channel id, as returned by
+                    load_harvest_checkpoints. Channels with a checkpoint are harvested
+                    incrementally.
+
+            The journal job stays open until complete_journal_job is called once the
+            results are stored.
 
-    def get_video_details(self, video_ids, channel_id):
+            Returns:
+                dict: A dictionary containing analysis results for each channel.
+                    """
+        if max_workers is not None:
+            self.max_workers = max(1, int(max_workers))
+
+        def analyze(channel_name):
+            try:
+                return self.analyze_channel(channel_name, checkpoints)
+            except QuotaBudgetExceeded as e:
+                print(f"Stopped harvesting channel '{channel_name}': {e}")
+                return "Quota budget exhausted."
+
+        channel_names = list(channel_names)
+        self._start_journal_job(channel_names, checkpoints)
+        self.prefetch_channels(channel_names)
+        if self.max_workers <= 1 or len(channel_names) <= 1:
+            results = [analyze(channel_name) for channel_name in channel_names]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(channel_names))) as executor:
+                results = list(executor.map(analyze, channel_names))
+        return dict(zip(channel_names, results))
+
+    def complete_journal_job(self, output):
         """
-        Retrieves video details from YouTube from both directly from channel and playlists.
+            Completes the journal job of analyze_channels after its output was written to
+            MongoDB and MySQL. The job is kept for the next run to resume if a channel
+            stopped at the quota budget or a write failed.
+                """
+        stopped = "Quota budget exhausted." in output.values()
+        if self.journal is not None and not self.write_failed and not stopped:
+            self.journal.complete()
+
+    def analyze_channel(self, channel_name, checkpoints=None):
+        """
+            Harvests channel details, playlists, videos and comments of a single channel.
+
+            Args:
+                channel_name (str): The name of the channel to analyze.
+                checkpoints (dict): Harvest checkpoints by channel id. If the channel has
+                    one, only its changes since that checkpoint are harvested.
+
+            Returns:
+                dict: The analysis result of the channel, or "Channel not found.".
+                    """
+        result = {}
+        for key, value in self.iter_channel(channel_name, checkpoints):
+            if key in STREAMED_RECORD_KEYS:
+                result.setdefault(key, []).extend(value)
+            else:
+                result[key] = value
+        if not result:
+            return "Channel not found."
+
+        result.setdefault('video_details', [])
+        result.setdefault('video_comments', [])
+        if result.get('incremental'):
+            result.setdefault('video_statistics', [])
+        return result
+
+    def iter_channel(self, channel_name, checkpoints=None):
         """
+            Harvests a single channel as a stream of (key, value) pairs.
 
-        def iso8601_to_hh_mm_ss(duration_str):
-            # Check if the duration string is empty
-            if not duration_str:
-                return '00:00:00'
+            Keys are those of the analyze_channel result. 'video_details',
+            'video_statistics' and 'video_comments' are yielded as record batches as soon
+            as they are fetched; the rest once. Nothing is yielded for an unknown channel.
 
-            # Remove the 'PT' prefix
-            temp_duration = duration_str[2:]
+            Args:
+                channel_name (str): The name of the channel to analyze.
+                checkpoints (dict): Harvest checkpoints by channel id. If the channel has
+                    one, only its changes since that checkpoint are harvested: new uploads,
+                    new videos of changed playlists, refreshed statistics of known videos
+                    and comments newer than the last harvested one.
+                    """
+        channel_id = self._journaled(f"channel_id:{channel_name}",
+                                     lambda: self.resolve_channel_ids([channel_name]).get(channel_name))
+        if not channel_id:
+            return
+        # An id that was entered directly is only checked here; unknown channels stop
+        # before their playlists and videos are searched for
+        if channel_id in self._channel_details:
+            channel_details = self._channel_details.pop(channel_id)
+        else:
+            channel_details = self.get_channel_details(channel_id)
+        if not channel_details:
+            return
+        yield 'channel_id', channel_id
+        yield 'channel_details', channel_details
+        uploads_playlist_id = channel_details.get('uploads_playlist_id')
 
-            # Initialize variables to store hours, minutes, and seconds
-            hours = 0
-            minutes = 0
-            seconds = 0
+        checkpoint = (checkpoints or {}).get(channel_id)
+        if checkpoint:
+            yield 'incremental', True
+        known_comment_counts = checkpoint.get('comment_counts', {}) if checkpoint else {}
+        previous_etags = checkpoint.get('playlist_etags', {}) if checkpoint else {}
+        published_after = checkpoint.get('last_video_published_at') if checkpoint else None
 
-            # Check if 'H' is present to parse hours
-            if 'H' in temp_duration:
-                hours, temp_duration = temp_duration.split('H')
-                hours = int(hours)
+        playlist_etags = {}
+        playlist_ids = self.get_all_playlist_ids(channel_id, playlist_etags)
+        if playlist_ids:
+            yield 'playlist_ids', playlist_ids
 
-            # Check if 'M' is present to parse minutes
-            if 'M' in temp_duration:
-                minutes, temp_duration = temp_duration.split('M')
-                minutes = int(minutes)
+        # Build one deduplicated set of video ids from the playlists and the channel's
+        # uploads, so details and comments are fetched only once per video. Incremental
+        # harvests read uploads newest first down to the last video seen, and only
+        # re-enumerate playlists whose etag changed since the checkpoint.
+        video_ids = dict.fromkeys(
+            video_id for video_id in self.video_ids_from_channel(channel_id, uploads_playlist_id, published_after)
+            if video_id not in known_comment_counts)
+        other_playlists = [playlist['playlist_id'] for playlist in playlist_ids
+                           if playlist['playlist_id'] != uploads_playlist_id
+                           and (not checkpoint or playlist_etags.get(playlist['playlist_id'])
+                                != previous_etags.get(playlist['playlist_id']))]
+        if other_playlists:
+            video_ids.update(dict.fromkeys(
+                video_id for video_id in self.video_ids_from_playlist(other_playlists)
+                if video_id not in known_comment_counts))
+        video_ids = list(video_ids)
+        yield 'video_ids', video_ids
 
-            # Check if 'S' is present to parse seconds
-            if 'S' in temp_duration:
-                seconds = temp_duration.replace('S', '')
-                seconds = int(seconds)
+        def latest(current, timestamps):
+            timestamps = [timestamp for timestamp in timestamps if timestamp and timestamp[0].isdigit()]
+            if current:
+                timestamps.append(current)
+            return max(timestamps) if timestamps else None
 
-            # Format hours, minutes, and seconds
-            formatted_duration = '{:02d}:{:02d}:{:02d}'.format(hours, minutes, seconds)
+        last_video_published_at = None
+        for video_details in self.iter_video_details(video_ids, channel_id):
+            last_video_published_at = latest(last_video_published_at,
+                                             [video['published_at'] for video in video_details])
+            yield 'video_details', video_details
 
-            return formatted_duration
+        # Known videos only need their comments re-read when the comment count grew
+        commented_video_ids = []
+        for video_statistics in self.iter_video_statistics(list(known_comment_counts), channel_id):
+            commented_video_ids.extend(
+                statistics['video_id'] for statistics in video_statistics
+                if self.to_int(statistics['comment_count'])
+                > self.to_int(known_comment_counts.get(statistics['video_id'])))
+            yield 'video_statistics', video_statistics
 
-        video_details = []
-        for video_id in video_ids:
-            try:
-                request = self.youtube.videos().list(
-                    part="snippet,statistics,contentDetails",
-                    id=video_id
-                )
-                response = request.execute()
-                if 'items' in response:
-                    for item in response['items']:
-                        title = item['snippet']['title']
-                        description = item['snippet'].get('description', 'N/A')
-                        published_at = (item['snippet'].get('publishedAt', 'N/A')
-                                        .replace('Z', '').replace('T', ' '))
-                        view_count = item['statistics'].get('viewCount', 'N/A')
-                        like_count = item['statistics'].get('likeCount', 'N/A')
-                        dislike_count = item['statistics'].get('dislikeCount')
-                        comment_count = item['statistics'].get('commentCount', 'N/A')
-                        favorite_count = item['statistics'].get('favoriteCount', 'N/A')
-                        duration = item['contentDetails']['duration']
-                        duration = iso8601_to_hh_mm_ss(duration)  # Convert duration to HH:MM:SS format
-
-                        thumbnail_url = item['snippet']['thumbnails']['default']['url']
-                        caption_status = item['contentDetails'].get('caption', 'N/A')
-
-                        video_details.append({
-                            "channel_id": channel_id,
-                            "video_id": video_id,
-                            "title": title,
-                            "description": description,
-                            "published_at": published_at,
-                            "view_count": view_count,
-                            "like_count": like_count,
-                            "dislike_count": dislike_count,
-                            "comment_count": comment_count,
-                            "favorite_count": favorite_count,
-                            "duration": duration,
-                            "thumbnail_url": thumbnail_url,
-                            "caption_status": caption_status
-                        })
-            except HttpError as e:
-                print("An error occurred:", e)
-                break
-        return video_details
+        last_comment_published_at = None
+        for video_comments in chain(self.iter_video_comments(video_ids),
+                                    self.iter_video_comments(commented_video_ids,
+                                                             checkpoint.get('last_comment_published_at')
+                                                             if checkpoint else None)):
+            last_comment_published_at = latest(last_comment_published_at,
+                                               [comment['comment_published_at'] for comment in video_comments
+                                                if 'parent_id' not in comment])
+            yield 'video_comments', video_comments
 
-    def get_video_comments(self, video_ids):
+        yield 'checkpoint', self.build_checkpoint(channel_id, [last_video_published_at],
+                                                  [last_comment_published_at], playlist_etags, checkpoint)
+
+    @staticmethod
+    def to_int(value):
         """
-            Retrieves comments from a video on YouTube based on the provided video ID.
+            Converts an API counter such as '123' or 'N/A' to an int, defaulting to 0.
                 """
-        video_comments = []
-        for video_id in video_ids:
-            next_page_token = None
-            comment_count = 0  # Counter for the number of comments fetched
-            while comment_count < 100:  # Limit to the top 100 comments
-                try:
-                    request = self.youtube.commentThreads().list(
-                        part="snippet",
-                        videoId=video_id,
-                        maxResults=100,
-                        pageToken=next_page_token
-                    )
-                    response = request.execute()
-                    if 'items' in response:
-                        for item in response['items']:
-                            comment_id = item['snippet']['topLevelComment']['id']
-                            commenter_name = item['snippet']['topLevelComment']['snippet']['authorDisplayName']
-                            comment_text = item['snippet']['topLevelComment']['snippet']['textDisplay']
-                            comment_published_at = (item['snippet']['topLevelComment']['snippet']
-                                                    .get('publishedAt', 'N/A').replace('Z', '').replace('T', ' '))
-
-                            video_comments.append({
-                                "comment_id": comment_id,
-                                "video_id": video_id,
-                                "commenter_name": commenter_name,
-                                "comment_text": comment_text,
-                                "comment_published_at": comment_published_at
-                            })
-                            comment_count += 1  # Increment the comment count
-                        next_page_token = response.get('nextPageToken')
-                        if not next_page_token:
-                            break
-                    else:
-                        break
-                except HttpError as e:
-                    print("An error occurred:", e)
-                    break
-        return video_comments
+        return int(value) if value is not None and str(value).isdigit() else 0
 
-    def analyze_channels(self, channel_names):
+    @staticmethod
+    def build_checkpoint(channel_id, video_published_times, comment_published_times, playlist_etags, previous=None):
         """
-            Analyzes the specified YouTube channels.
+            Builds the harvest high-water marks of a channel.
+
+            Returns:
+                dict: The channel id, the latest video and comment publish times
+                    ('YYYY-MM-DDTHH:MM:SSZ') and the etag of every playlist.
+                    """
+        previous = previous or {}
+
+        def latest(values, key):
+            timestamps = [value for value in values if value and value[0].isdigit()]
+            if previous.get(key):
+                timestamps.append(previous[key])
+            return max(timestamps) if timestamps else None
+
+        return {
+            'channel_id': channel_id,
+            'last_video_published_at': latest(video_published_times, 'last_video_published_at'),
+            'last_comment_published_at': latest(comment_published_times, 'last_comment_published_at'),
+            'playlist_etags': playlist_etags
+        }
+
+    @staticmethod
+    def load_harvest_checkpoints(mongo_uri, mongodb_db_name, channel_ids=None):
+        """
+            Loads the harvest checkpoints of the given channels, or of every channel
+            stored in MongoDB.
+
+            Channels harvested before checkpoints existed get one derived from their
+            stored videos and comments. The videos are aggregated per channel inside
+            MongoDB, so only their ids, comment counts and latest publish time are read.
 
             Args:
-                channel_names (list): A list of channel names to analyze.
+                channel_ids (list): Ids of the channels about to be harvested; None for all.
 
             Returns:
-                dict: A dictionary containing analysis results for each channel.
+                dict: Checkpoints by channel id, each with the comment count of every
+                    known video under 'comment_counts'.
                     """
-        output = {}
-        for channel_name in channel_names:
-            channel_id = self.get_channel_id(channel_name)
-            if channel_id:
-                output[channel_name] = {}
-                output[channel_name]['channel_id'] = channel_id
-                channel_details = self.get_channel_details(channel_id)
-                output[channel_name]['channel_details'] = channel_details
-                playlist_ids = self.get_all_playlist_ids(channel_id)
-                if playlist_ids:
-                    output[channel_name]['playlist_ids'] = playlist_ids
-                    video_ids = self.video_ids_from_playlist([playlist['playlist_id']
-                                                              for playlist in playlist_ids])
-                    output[channel_name]['video_ids'] = video_ids
-
-                    video_details = self.get_video_details(video_ids, channel_id)
-                    output[channel_name]['video_details'] = video_details
-
-                    video_comments = self.get_video_comments(video_ids)
-                    output[channel_name]['video_comments'] = video_comments
-
-                    video_ids = self.video_ids_from_channel(channel_id)
-                    output[channel_name]['video_ids'] = video_ids
-
-                    video_details = self.get_video_details(video_ids, channel_id)
-                    output[channel_name]['video_details'] = video_details
-
-                    video_comments = self.get_video_comments(video_ids)
-                    output[channel_name]['video_comments'] = video_comments
+        checkpoints = {}
+        try:
+            mongo_client = get_mongo_client(mongo_uri)
+            db = mongo_client[mongodb_db_name]
+            channel_filter = {} if channel_ids is None else {'channel_id': {'$in': list(channel_ids)}}
+            states = {state['channel_id']: state for state in db.harvest_state.find(channel_filter, {'_id': 0})}
+            videos = {summary['_id']: summary for summary in db.videos.aggregate([
+                {'$match': channel_filter},
+                {'$group': {'_id': '$channel_id',
+                            'last_published_at': {'$max': '$published_at'},
+                            'comment_counts': {'$push': {'video_id': '$video_id',
+                                                         'comment_count': '$comment_count'}}}}
+            ])}
+
+            for channel in db.channels.find(channel_filter, {'_id': 0, 'channel_id': 1}):
+                channel_id = channel['channel_id']
+                summary = videos.get(channel_id, {})
+                comment_counts = {video['video_id']: video.get('comment_count')
+                                  for video in summary.get('comment_counts', [])}
+                checkpoint = states.get(channel_id)
+                if checkpoint is not None:
+                    for key in ('last_video_published_at', 'last_comment_published_at'):
+                        checkpoint[key] = api_timestamp(checkpoint.get(key))
                 else:
-                    video_ids = self.video_ids_from_channel(channel_id)
-                    output[channel_name]['video_ids'] = video_ids
+                    latest_comment = db.comments.find_one({'video_id': {'$in': list(comment_counts)}},
+                                                          {'_id': 0, 'comment_published_at': 1},
+                                                          sort=[('comment_published_at', pymongo.DESCENDING)])
+                    checkpoint = {
+                        'channel_id': channel_id,
+                        'last_video_published_at': api_timestamp(summary.get('last_published_at')),
+                        'last_comment_published_at': api_timestamp(latest_comment['comment_published_at'])
+                        if latest_comment else None,
+                        'playlist_etags': {}
+                    }
+                checkpoint['comment_counts'] = comment_counts
+                checkpoints[channel_id] = checkpoint
+        except Exception as e:
+            print("An error occurred while loading harvest checkpoints from MongoDB Atlas:", e)
+        return checkpoints
 
-                    video_details = self.get_video_details(video_ids, channel_id)
-                    output[channel_name]['video_details'] = video_details
+    @staticmethod
+    def ensure_mongodb_indexes(db):
+        """
+            Creates the unique indexes that make MongoDB writes idempotent.
 
-                    video_comments = self.get_video_comments(video_ids)
-                    output[channel_name]['video_comments'] = video_comments
-            else:
-                output[channel_name] = "Channel not found."
-        pprint.pprint(output)
-        return output
+            Args:
+                db: The pymongo Database holding the harvested collections.
+                    """
+        for collection_name, key in MONGODB_UNIQUE_KEYS.items():
+            try:
+                db[collection_name].create_index(key, unique=True)
+            except pymongo.errors.PyMongoError as e:
+                print(f"Could not create unique index on {collection_name}.{key}: {e}")
 
     @staticmethod
-    def insert_data_to_mongodb(output, mongo_uri, mongodb_db_name):
+    def bulk_upsert(collection, documents, key, batch_size=MONGODB_BATCH_SIZE, upsert=True):
+        """
+            Writes documents with unordered bulk_write batches of UpdateOne operations.
+
+            Args:
+                collection: The pymongo Collection to write to.
+                documents (iterable): The documents to write.
+                key (str): The field identifying a document.
+                batch_size (int): The number of operations sent per bulk_write call.
+                upsert (bool): Whether documents missing from the collection are inserted.
+
+            Returns:
+                dict: The number of inserted, updated and unchanged documents.
+                    """
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+        def flush(operations):
+            result = collection.bulk_write(operations, ordered=False)
+            counts['inserted'] += result.upserted_count
+            counts['updated'] += result.modified_count
+            counts['unchanged'] += result.matched_count - result.modified_count
+
+        operations = []
+        for document in documents:
+            fields = {name: value for name, value in document.items() if name != '_id'}
+            operations.append(pymongo.UpdateOne({key: document[key]}, {"$set": fields}, upsert=upsert))
+            if len(operations) >= batch_size:
+                flush(operations)
+                operations = []
+        if operations:
+            flush(operations)
+        return counts
+
+    def insert_data_to_mongodb(self, output, mongo_uri, mongodb_db_name, batch_size=MONGODB_BATCH_SIZE):
         """
             Inserts data into MongoDB collection.
-                """
+
+            Documents are upserted on their unique ids in bulk batches, so reloading the
+            same harvest updates documents instead of duplicating them.
+
+            Returns:
+                dict: Inserted, updated and unchanged counts per collection.
+                    """
+        totals = {collection_name: {'inserted': 0, 'updated': 0, 'unchanged': 0}
+                  for collection_name in ('channels', 'playlists', 'videos', 'comments')}
+
+        def write(collection_name, documents, key, upsert=True):
+            frame = self._normalize(documents)
+            with self.metrics.stage('mongo_write'):
+                counts = self.bulk_upsert(db[collection_name], normalized_documents(frame, documents), key,
+                                          batch_size, upsert)
+            self.metrics.add_rows('mongo_write', len(documents))
+            for name, value in counts.items():
+                totals[collection_name][name] += value
+
         try:
-            mongo_client = pymongo.MongoClient(mongo_uri)
+            mongo_client = get_mongo_client(mongo_uri)
             db = mongo_client[mongodb_db_name]
+            self.ensure_mongodb_indexes(db)
 
             for channel_name, data in output.items():
+                if not isinstance(data, dict):
+                    print(f"Channel '{channel_name}': {data} Skipping insertion.")
+                    continue
                 try:
-                    # Check if the channel already exists in the database
-                    existing_channel = db.channels.find_one(
-                        {"channel_id": data['channel_details']['channel_id']}
-                                                            )
-                    if existing_channel:
-                        print(f"Channel '{channel_name}' already exists in MongoDB Atlas. Skipping insertion.")
-                        continue
-
-                    # Insert channel details
-                    db.channels.insert_one(data['channel_details'])
-                    print(f"Channel '{channel_name}' details inserted to MongoDB Atlas.")
-
-                    # Insert playlist data if available
-                    if 'playlist_ids' in data:
-                        db.playlists.insert_many(data['playlist_ids'])
-                        print(f"Playlist data inserted for channel '{channel_name}'.")
-
-                    # Insert video details if available
-                    if 'video_details' in data:
-                        db.videos.insert_many(data['video_details'])
-                        print(f"Video details inserted for channel '{channel_name}'.")
-
-                    # Insert video comments if available
-                    if 'video_comments' in data and isinstance(
-                            data['video_comments'], list) and data['video_comments']:
-                        db.comments.insert_many(data['video_comments'])
-                        print(f"Video comments inserted for channel '{channel_name}'.")
+                    write('channels', [data['channel_details']], 'channel_id')
+
+                    # Write playlist data if available
+                    if data.get('playlist_ids'):
+                        write('playlists', data['playlist_ids'], 'playlist_id')
+
+                    # Write video details if available
+                    if data.get('video_details'):
+                        write('videos', data['video_details'], 'video_id')
+
+                    # Refresh statistics of already stored videos
+                    if data.get('video_statistics'):
+                        write('videos', data['video_statistics'], 'video_id', upsert=False)
+
+                    # Write video comments if available
+                    if isinstance(data.get('video_comments'), list) and data['video_comments']:
+                        write('comments', data['video_comments'], 'comment_id')
+
+                    # Record the high-water marks for the next incremental harvest
+                    if 'checkpoint' in data:
+                        db.harvest_state.replace_one({"channel_id": data['channel_id']},
+                                                     data['checkpoint'], upsert=True)
 
                 except Exception as e:
                     print(f"An error occurred while inserting data for channel '{channel_name}': {e}")
+                    self.write_failed = True
 
         except Exception as e:
             print("An error occurred while inserting data to MongoDB Atlas:", e)
+            self.write_failed = True
+        return totals
 
     @staticmethod
     def create_mysql_database(host, user, password, database):
@@ -416,12 +3425,9 @@ class YouTubeChannelAnalyzer:
         connection = None  # Initialize connection variable
         cursor = None  # Initialize cursor variable
         try:
-            # Establish connection to the MySQL server without specifying the database
-            connection = mysql.connector.connect(
-                host=host,
-                user=user,
-                password=password,
-            )
+            # A short-lived connection to the MySQL server, without a database; pooling it
+            # would keep a whole pool open for this one-time check
+            connection = mysql_connector.connect(**_mysql_config(host, user, password))
 
             # Create a cursor object to execute SQL commands
             cursor = connection.cursor()
@@ -442,35 +3448,33 @@ class YouTubeChannelAnalyzer:
 
             # Commit the transaction
             connection.commit()
-        except mysql.connector.Error as err:
+        except mysql_connector.Error as err:
             print(f"Error: {err}")
         finally:
             if cursor is not None:
                 cursor.close()
-            if connection is not None and connection.is_connected():
+            if connection is not None:
                 connection.close()
 
     @staticmethod
-    def create_mysql_tables(host, user, password, database):
+    def create_mysql_tables(host, user, password, database, comment_partitions=0):
         """
-            Creates MySQL tables if they do not already exist.
+            Creates MySQL tables if they do not already exist and migrates them to the
+            latest schema version.
 
             Args:
                 host (str): The MySQL host.
                 user (str): The MySQL user.
                 password (str): The MySQL password.
                 database (str): The name of the database.
+                comment_partitions (int): If set, the comments table is hash partitioned
+                    on comment_id into this many partitions.
 
             Returns:
                 None
                     """
-        # Establish connection to the  AWS MySQL database
-        connection = mysql.connector.connect(
-            host=host,
-            user=user,
-            password=password,
-            database=database
-        )
+        # Take a connection to the AWS MySQL database from the shared pool
+        connection = connect_mysql(host, user, password, database)
 
         # Create cursor object to execute SQL commands
         cursor = connection.cursor()
@@ -529,23 +3533,315 @@ class YouTubeChannelAnalyzer:
             FOREIGN KEY (video_id) REFERENCES videos(video_id)
         )
         """
+
+        # Single row counter bumped by every load, used to invalidate cached query results
+        create_warehouse_version_table = """
+        CREATE TABLE IF NOT EXISTS warehouse_version (
+            id TINYINT PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        )
+        """
         # Execute SQL commands to create tables
         cursor.execute(create_channels_table)
         cursor.execute(create_playlists_table)
         cursor.execute(create_videos_table)
         cursor.execute(create_comments_table)
+        cursor.execute(create_warehouse_version_table)
+        cursor.execute("INSERT IGNORE INTO warehouse_version (id, version) VALUES (1, 0)")
 
         # Commit the transaction and close cursor/connection
         connection.commit()
-        cursor.close()
-        connection.close()
+        try:
+            YouTubeChannelAnalyzer.migrate_mysql_schema(connection, cursor)
+            if comment_partitions:
+                YouTubeChannelAnalyzer.partition_mysql_comments(connection, cursor, comment_partitions)
+        finally:
+            cursor.close()
+            connection.close()
 
         print("Tables created successfully in AWS RDS MySQL database.")
 
-    def import_data_to_mysql(self, mongo_uri, mongodb_db_name, host, user, password, database):
+    @staticmethod
+    def migrate_mysql_schema(connection, cursor):
+        """
+            Applies the MYSQL_MIGRATIONS not yet recorded in the schema_migrations table.
+
+            MySQL commits DDL implicitly, so each migration is recorded right after its
+            statements ran; a failed migration stops the run and is retried next time.
+            Statements of a retried migration whose precondition no longer holds in
+            information_schema were applied by the failed run and are skipped.
+
+            Returns:
+                list: The versions applied.
+                    """
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT PRIMARY KEY,
+                description VARCHAR(255),
+                applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+            """)
+        cursor.execute("SELECT version FROM schema_migrations")
+        applied_versions = {row[0] for row in cursor.fetchall()}
+
+        applied = []
+        for version, description, statements in MYSQL_MIGRATIONS:
+            if version in applied_versions:
+                continue
+            for statement in statements:
+                statement, precondition = statement if isinstance(statement, tuple) else (statement, None)
+                if precondition is None or YouTubeChannelAnalyzer._migration_step_pending(cursor, precondition):
+                    cursor.execute(statement)
+            cursor.execute("INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                           (version, description))
+            connection.commit()
+            applied.append(version)
+            print(f"Applied MySQL schema migration {version}: {description}")
+        return applied
+
+    @staticmethod
+    def _migration_step_pending(cursor, precondition):
+        """
+            Checks the precondition of a migration statement against information_schema.
+                """
+        kind, table, name = precondition
+        if kind == 'no_index':
+            cursor.execute("""
+                SELECT COUNT(*) FROM information_schema.statistics
+                WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+                """, (table, name))
+        else:
+            cursor.execute("""
+                SELECT COUNT(*) FROM information_schema.columns
+                WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+                """, (table, name))
+        exists = cursor.fetchall()[0][0] > 0
+        return exists if kind == 'column' else not exists
+
+    @staticmethod
+    def partition_mysql_comments(connection, cursor, partitions):
+        """
+            Hash partitions the comments table on comment_id, if it is not partitioned yet.
+
+            MySQL does not allow foreign keys on partitioned tables, so the comments
+            foreign key to videos is dropped; the loaders check it themselves.
+                """
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.partitions
+            WHERE table_schema = DATABASE() AND table_name = 'comments' AND partition_name IS NOT NULL
+            """)
+        if cursor.fetchall()[0][0]:
+            return
+        cursor.execute("""
+            SELECT constraint_name FROM information_schema.referential_constraints
+            WHERE constraint_schema = DATABASE() AND table_name = 'comments'
+            """)
+        for (constraint_name,) in cursor.fetchall():
+            cursor.execute(f"ALTER TABLE comments DROP FOREIGN KEY {constraint_name}")
+        cursor.execute(f"ALTER TABLE comments PARTITION BY KEY (comment_id) PARTITIONS {int(partitions)}")
+        connection.commit()
+        print(f"Partitioned the comments table into {int(partitions)} partitions.")
+
+    def _normalize(self, records):
+        """
+            Runs the normalization stage on a batch of records, timed in the metrics.
+                """
+        with self.metrics.stage('normalize'):
+            frame = normalize_records(records)
+        self.metrics.add_rows('normalize', len(frame))
+        return frame
+
+    def _mysql_rows(self, table, documents):
+        """
+            Converts a batch of MongoDB documents to the column values of their MySQL table.
+                """
+        return normalized_rows(self._normalize(documents), MYSQL_TABLE_COLUMNS[table])
+
+    @staticmethod
+    def _to_tsv_field(value):
+        """
+            Escapes a value for LOAD DATA's default tab separated format.
+                """
+        if value is None:
+            return '\\N'
+        if isinstance(value, bool):
+            return '1' if value else '0'
+        return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+                .replace('\n', '\\n').replace('\r', '\\r'))
+
+    def _load_mysql_batch(self, table, columns, rows, method):
+        """
+            Upserts a batch of rows into a MySQL table and commits it.
+
+            method 'executemany' sends one multi-row INSERT ... ON DUPLICATE KEY UPDATE;
+            'load_data' streams a generated TSV with LOAD DATA LOCAL INFILE into a staging
+            table and upserts from there.
+                """
+        column_list = ', '.join(columns)
+        updates = ', '.join(f"{column} = VALUES({column})" for column in columns[1:])
+        if method == 'load_data':
+            with tempfile.NamedTemporaryFile('w', suffix='.tsv', encoding='utf-8', delete=False) as tsv_file:
+                for row in rows:
+                    tsv_file.write('\t'.join(self._to_tsv_field(value) for value in row) + '\n')
+            try:
+                # CREATE ... LIKE would copy partitioning, which temporary tables do not support
+                self.mysql_cursor.execute(
+                    f"CREATE TEMPORARY TABLE IF NOT EXISTS {table}_staging SELECT * FROM {table} LIMIT 0")
+                self.mysql_cursor.execute(f"TRUNCATE TABLE {table}_staging")
+                self.mysql_cursor.execute(f"""
+                    LOAD DATA LOCAL INFILE %s INTO TABLE {table}_staging
+                    CHARACTER SET utf8mb4 ({column_list})""", (tsv_file.name,))
+                self.mysql_cursor.execute(f"""
+                    INSERT INTO {table} ({column_list})
+                    SELECT {column_list} FROM {table}_staging
+                    ON DUPLICATE KEY UPDATE {updates}""")
+            finally:
+                os.remove(tsv_file.name)
+        else:
+            placeholders = ', '.join(['%s'] * len(columns))
+            self.mysql_cursor.executemany(f"""
+                INSERT INTO {table} ({column_list})
+                VALUES ({placeholders})
+                ON DUPLICATE KEY UPDATE {updates}""", rows)
+        self._bump_warehouse_version()
+        self.mysql_connection.commit()
+
+    def _load_existence_index(self, table):
+        """
+            Preloads the primary keys of a MySQL table into memory.
+
+            Returns:
+                set or BloomFilter: An exact set, or a Bloom filter for comment tables
+                    larger than BLOOM_FILTER_THRESHOLD rows.
+                    """
+        key = MYSQL_TABLE_COLUMNS[table][0]
+        self.mysql_cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        # fetchall reads the whole result, so the unbuffered cursor can run the next query
+        row_count = self.mysql_cursor.fetchall()[0][0]
+        if table == 'comments' and row_count > BLOOM_FILTER_THRESHOLD:
+            index = BloomFilter(capacity=row_count * 2)
+        else:
+            index = set()
+
+        self.mysql_cursor.execute(f"SELECT {key} FROM {table}")
+        while True:
+            rows = self.mysql_cursor.fetchmany(MYSQL_BATCH_SIZE * 10)
+            if not rows:
+                break
+            index.update(row[0] for row in rows)
+        return index
+
+    def _existing_keys(self, table, keys):
+        """
+            Returns the subset of keys present in the primary key of a MySQL table.
+                """
+        keys = list(set(keys))
+        if not keys:
+            return set()
+        key = MYSQL_TABLE_COLUMNS[table][0]
+        placeholders = ', '.join(['%s'] * len(keys))
+        self.mysql_cursor.execute(f"SELECT {key} FROM {table} WHERE {key} IN ({placeholders})", keys)
+        return {row[0] for row in self.mysql_cursor.fetchall()}
+
+    def _write_mysql_rows(self, table, rows, method, existence_index, stats):
+        """
+            Filters a batch of rows against the in-memory existence index, upserts the
+            remaining ones and records them in the index and in stats.
+
+            Rows whose parent key is unknown and comments already stored are skipped;
+            Bloom filter hits are confirmed with one query.
+                """
+        columns = MYSQL_TABLE_COLUMNS[table]
+        index = existence_index[table]
+        table_stats = stats.setdefault(table, {'rows': 0, 'skipped': 0, 'duplicates': 0})
+        if table in MYSQL_PARENT_TABLES:
+            parent_column, parent_table = MYSQL_PARENT_TABLES[table]
+            position = columns.index(parent_column)
+            kept = [row for row in rows if row[position] in existence_index[parent_table]]
+            table_stats['skipped'] += len(rows) - len(kept)
+            rows = kept
+        if table not in MYSQL_REFRESHED_TABLES:
+            candidates = [row[0] for row in rows if row[0] in index]
+            if candidates and isinstance(index, BloomFilter):
+                candidates = self._existing_keys(table, candidates)
+            candidates = set(candidates)
+            kept = [row for row in rows if row[0] not in candidates]
+            table_stats['duplicates'] += len(rows) - len(kept)
+            rows = kept
+        if rows:
+            with self.metrics.stage('mysql_import'):
+                self._load_mysql_batch(table, columns, rows, method)
+            self.metrics.add_rows('mysql_import', len(rows))
+            index.update(row[0] for row in rows)
+        table_stats['rows'] += len(rows)
+
+    def _update_mysql_statistics(self, video_statistics):
+        """
+            Updates the counters of already stored videos and commits once.
+
+            Args:
+                video_statistics (pandas.DataFrame): Normalized statistics records.
+                    """
+        rows = normalized_rows(video_statistics, VIDEO_STATISTICS_COLUMNS + ('video_id',))
+        assignments = ', '.join(f"{column} = %s" for column in VIDEO_STATISTICS_COLUMNS)
+        self.mysql_cursor.executemany(f"UPDATE videos SET {assignments} WHERE video_id = %s", rows)
+        self._bump_warehouse_version()
+        self.mysql_connection.commit()
+
+    def _bump_warehouse_version(self):
+        """
+            Increments the warehouse data version in the current transaction, so cached
+            query results are invalidated exactly when the loaded rows are committed.
+                """
+        self.mysql_cursor.execute("UPDATE warehouse_version SET version = version + 1 WHERE id = 1")
+
+    def _warehouse_version(self):
+        """
+            Returns the warehouse data version, or 0 if the warehouse predates it.
+                """
+        try:
+            self.mysql_cursor.execute("SELECT version FROM warehouse_version WHERE id = 1")
+            rows = self.mysql_cursor.fetchall()
+        except mysql_connector.ProgrammingError:
+            return 0
+        return rows[0][0] if rows else 0
+
+    def _connect_mysql(self, host, user, password, database, method='executemany'):
+        """
+            Opens the MySQL connection and cursor used by the loaders.
+                """
+        # Only the loader uses LOAD DATA connections, so their pool holds a single one
+        if method == 'load_data':
+            self.mysql_connection = connect_mysql(host, user, password, database, allow_local_infile=True,
+                                                  pool_size=1)
+        else:
+            self.mysql_connection = connect_mysql(host, user, password, database)
+        self.mysql_cursor = self.mysql_connection.cursor()
+
+    def _close_mysql(self):
+        """
+            Returns the loaders' MySQL connection to its pool.
+                """
+        if self.mysql_connection is not None:
+            try:
+                if self.mysql_cursor is not None:
+                    self.mysql_cursor.close()
+                self.mysql_connection.close()
+            except mysql_connector.Error as e:
+                print(f"Error closing the MySQL connection: {e}")
+            self.mysql_connection = None
+            self.mysql_cursor = None
+
+    def import_data_to_mysql(self, mongo_uri, mongodb_db_name, host, user, password, database,
+                             batch_size=MYSQL_BATCH_SIZE, method='executemany'):
         """
             Imports data from MongoDB to MySQL.
 
+            MongoDB cursors are streamed in batches, each batch is upserted with a single
+            statement and committed once. The primary keys already in MySQL are preloaded
+            into memory, so foreign key checks and skipping of stored comments happen
+            locally instead of with a SELECT per row.
+
             Args:
                 mongo_uri (str): The MongoDB URI.
                 mongodb_db_name (str): The name of the MongoDB database.
@@ -553,183 +3849,189 @@ class YouTubeChannelAnalyzer:
                 user (str): The MySQL user.
                 password (str): The MySQL password.
                 database (str): The name of the MySQL database.
+                batch_size (int): The number of rows loaded and committed at once.
+                method (str): 'executemany' for multi-row INSERT ... ON DUPLICATE KEY UPDATE,
+                    or 'load_data' for LOAD DATA LOCAL INFILE from a generated TSV file.
 
             Returns:
-                None
+                dict: Rows loaded, seconds taken and rows per second for every table.
                     """
+        stats = {}
         try:
             # Connect to MongoDB Atlas
-            self.mongo_client = pymongo.MongoClient(mongo_uri)
+            self.mongo_client = get_mongo_client(mongo_uri)
             self.mongo_db = self.mongo_client[mongodb_db_name]
 
             # Connect to AWS MySQL
-            self.mysql_connection = mysql.connector.connect(
-                host=host,
-                user=user,
-                password=password,
-                database=database
-            )
-            self.mysql_cursor = self.mysql_connection.cursor()
+            self._connect_mysql(host, user, password, database, method)
+            existence_index = {table: self._load_existence_index(table) for table in MYSQL_TABLE_COLUMNS}
 
-            # Fetch data from MongoDB Atlas
-            channels_data = self.mongo_db.channels.find({})
-            playlists_data = self.mongo_db.playlists.find({})
-            videos_data = self.mongo_db.videos.find({})
-            comments_data = self.mongo_db.comments.find({})
+            # Parents are loaded before children so foreign keys resolve
+            for table in MYSQL_TABLE_COLUMNS:
+                started = time.perf_counter()
+                batch = []
+                for document in self.mongo_db[table].find({}, {'_id': 0}).batch_size(batch_size):
+                    batch.append(document)
+                    if len(batch) >= batch_size:
+                        self._write_mysql_rows(table, self._mysql_rows(table, batch), method, existence_index, stats)
+                        batch = []
+                if batch:
+                    self._write_mysql_rows(table, self._mysql_rows(table, batch), method, existence_index, stats)
 
-            # Insert channel data into AWS MySQL
-            for channel in channels_data:
-                try:
-                    # Check if the channel already exists in MySQL
-                    self.mysql_cursor.execute("SELECT COUNT(*) FROM channels WHERE channel_id = %s",
-                                              (channel['channel_id'],))
-                    channel_exists = self.mysql_cursor.fetchone()[0]
-                    if not channel_exists:
-                        self.mysql_cursor.execute("""
-                                        INSERT INTO channels (
-                                        channel_id, channel_name, channel_type, channel_status, video_count,
-                                        view_count, subs_count, publish_date, description, hidden_subs_count)
-                                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-                                                  (
-                                                      channel['channel_id'],
-                                                      channel['channel_name'],
-                                                      channel['channel_type'],
-                                                      channel['channel_status'],
-                                                      channel['video_count'],
-                                                      channel['view_count'],
-                                                      channel['subs_count'],
-                                                      channel['publish_date'],
-                                                      channel['description'],
-                                                      channel['hidden_subs_count']
-                                                  ))
-                        self.mysql_connection.commit()
-                        print(f"Channel with ID {channel['channel_id']} inserted successfully.")
-                    else:
-                        print(f"Channel with ID {channel['channel_id']} already exists in MySQL. Skipping insertion.")
-                except Exception as e:
-                    print(f"Error inserting channel data: {e}")
+                table_stats = stats.setdefault(table, {'rows': 0, 'skipped': 0, 'duplicates': 0})
+                elapsed = time.perf_counter() - started
+                table_stats['seconds'] = elapsed
+                table_stats['rows_per_second'] = table_stats['rows'] / elapsed if elapsed else 0.0
 
-            # Insert playlist data into AWS MySQL
-            for playlist in playlists_data:
-                try:
-                    # Check if the playlist already exists in MySQL
-                    self.mysql_cursor.execute("SELECT COUNT(*) FROM playlists WHERE playlist_id = %s",
-                                              (playlist['playlist_id'],))
-                    playlist_exists = self.mysql_cursor.fetchone()[0]
-                    if not playlist_exists:
-                        self.mysql_cursor.execute("""
-                            INSERT INTO playlists (channel_id, playlist_id, playlist_name)
-                                                    VALUES (%s, %s, %s)""",
-                                                  (
-                                                      playlist['channel_id'],
-                                                      playlist['playlist_id'],
-                                                      playlist['playlist_name']
-                                                  ))
-                        self.mysql_connection.commit()
-                        print(f"Playlist with ID {playlist['playlist_id']} inserted successfully.")
-                    else:
-                        print(
-                            f"Playlist with ID {playlist['playlist_id']} already exists in MySQL. Skipping insertion.")
-                except Exception as e:
-                    print(f"Error inserting playlist data: {e}")
+        except (mysql_connector.Error, pymongo.errors.PyMongoError) as e:
+            print(f"Error importing data to MySQL: {e}")
+            self.write_failed = True
+        finally:
+            self._close_mysql()
+        return stats
 
-            # Insert video data into AWS MySQL
-            for video in videos_data:
-                try:
-                    # Check if the video_id already exists in the videos table
-                    self.mysql_cursor.execute("SELECT COUNT(*) FROM videos WHERE video_id = %s",
-                                              (video['video_id'],))
-                    video_exists = self.mysql_cursor.fetchone()[0]
-                    if not video_exists:
-                        # Replace non-integer values with appropriate defaults
-                        like_count = int(video['like_count']) if video['like_count'] is not None and video[
-                                        'like_count'].isdigit() else 0
-                        dislike_count = int(video['dislike_count']) if video['dislike_count'] is not None and video[
-                                        'dislike_count'].isdigit() else 0
-                        comment_count = int(video['comment_count']) if video['comment_count'] is not None and video[
-                                        'comment_count'].isdigit() else 0
-                        favorite_count = int(video['favorite_count']) if video['favorite_count'] is not None and video[
-                                        'favorite_count'].isdigit() else 0
-
-                        self.mysql_cursor.execute("""
-                                INSERT INTO videos (channel_id, video_id, title, description, published_at, view_count,
-                                                    like_count, dislike_count, comment_count, favorite_count, duration,
-                                                    thumbnail_url, caption_status)
-                                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                            """, (
-                            video['channel_id'],
-                            video['video_id'],
-                            video['title'],
-                            video['description'],
-                            video['published_at'],
-                            video['view_count'],
-                            like_count,
-                            dislike_count,
-                            comment_count,
-                            favorite_count,
-                            video['duration'],
-                            video['thumbnail_url'],
-                            video['caption_status']
-                        ))
-                        self.mysql_connection.commit()
-                        print(f"Video with ID {video['video_id']} inserted successfully.")
-                    else:
-                        print(f"Skipping insertion of video with video_id '{video['video_id']}' as it already exists.")
-                except Exception as e:
-                    print(f"Error inserting video data: {e}")
+    def stream_channels_to_databases(self, channel_names, mongo_uri, mongodb_db_name, host, user, password,
+                                     database, max_workers=None, checkpoints=None, queue_size=STREAM_QUEUE_SIZE,
+                                     method='executemany'):
+        """
+            Harvests channels and writes their records to MongoDB and MySQL as they arrive.
+
+            Harvester threads push record batches into a bounded queue that the calling
+            thread drains into both databases. A full queue blocks the harvesters, so
+            memory stays bounded by the queue size regardless of channel size, and
+            database writes overlap with fetching. No output dict is built. The MySQL
+            tables must already exist.
+
+            Args:
+                channel_names (list): A list of channel names to analyze.
+                mongo_uri (str): The MongoDB URI.
+                mongodb_db_name (str): The name of the MongoDB database.
+                host (str): The MySQL host.
+                user (str): The MySQL user.
+                password (str): The MySQL password.
+                database (str): The name of the MySQL database.
+                max_workers (int): The number of concurrent harvesting threads.
+                checkpoints (dict): Harvest checkpoints by channel id for incremental harvests.
+                queue_size (int): The maximum number of batches waiting to be written.
+                method (str): The MySQL load method, see import_data_to_mysql.
 
-            # Insert comment data into AWS MySQL
-            for comment in comments_data:
+            Returns:
+                dict: MongoDB write counts per collection and MySQL load counts per table.
+                    """
+        if max_workers is not None:
+            self.max_workers = max(1, int(max_workers))
+        channel_names = list(channel_names)
+        records = queue.Queue(maxsize=queue_size)
+        stop = threading.Event()
+        interrupted = threading.Event()
+        done = object()
+        self._start_journal_job(channel_names, checkpoints)
+        self.prefetch_channels(channel_names)
+
+        def put(item):
+            while not stop.is_set():
                 try:
-                    # Check if the comment already exists in the MySQL database
-                    self.mysql_cursor.execute("SELECT COUNT(*) FROM comments WHERE comment_id = %s",
-                                              (comment['comment_id'],))
-                    comment_exists = self.mysql_cursor.fetchone()[0]
-
-                    if not comment_exists:
-                        # Check if the corresponding video exists in the videos table
-                        video_id = comment['video_id']
-                        self.mysql_cursor.execute("SELECT COUNT(*) FROM videos WHERE video_id = %s",
-                                                  (video_id,))
-                        video_exists = self.mysql_cursor.fetchone()[0]
-
-                        if video_exists:
-                            # Insert the comment if the video exists
-                            self.mysql_cursor.execute("""
-                                        INSERT INTO comments (comment_id, video_id, commenter_name, comment_text,
-                                         comment_published_at)
-                                        VALUES (%s, %s, %s, %s, %s)
-                                    """, (
-                                comment['comment_id'],
-                                comment['video_id'],
-                                comment['commenter_name'],
-                                comment['comment_text'],
-                                comment['comment_published_at']
-                            ))
-                            self.mysql_connection.commit()
-                            print(f"Comment with ID {comment['comment_id']} inserted successfully.")
-                        else:
-                            print(f"Skipping comment with missing video: {comment['comment_id']}")
-                    else:
-                        print(f"Skipping duplicate comment: {comment['comment_id']}")
-                except Exception as e:
-                    print(f"Error inserting comment data: {e}")
+                    records.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def harvest(channel_name):
+            if self.journal is not None and self.journal.get(f"channel:{channel_name}"):
+                print(f"Channel '{channel_name}' was already stored by the interrupted run. Skipping.")
+                return
+            try:
+                found = False
+                for key, value in self.iter_channel(channel_name, checkpoints):
+                    found = True
+                    if not put((channel_name, key, value)):
+                        return
+                if not found:
+                    print(f"Channel '{channel_name}' not found.")
+            except QuotaBudgetExceeded as e:
+                interrupted.set()
+                print(f"Stopped harvesting channel '{channel_name}': {e}")
+            except Exception as e:
+                interrupted.set()
+                print(f"An error occurred while harvesting channel '{channel_name}': {e}")
+
+        def harvest_all():
+            try:
+                with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(channel_names)))) as executor:
+                    list(executor.map(harvest, channel_names))
+            finally:
+                put(done)
+
+        mongo_counts = {collection_name: {'inserted': 0, 'updated': 0, 'unchanged': 0}
+                        for collection_name in ('channels', 'playlists', 'videos', 'comments')}
+        mysql_stats = {}
+        producer = threading.Thread(target=harvest_all, daemon=True)
+        try:
+            mongo_client = get_mongo_client(mongo_uri)
+            db = mongo_client[mongodb_db_name]
+            self.ensure_mongodb_indexes(db)
+            self._connect_mysql(host, user, password, database, method)
+            existence_index = {table: self._load_existence_index(table) for table in MYSQL_TABLE_COLUMNS}
+
+            producer.start()
+            while True:
+                item = records.get()
+                if item is done:
+                    break
+                channel_name, key, value = item
+                if key == 'checkpoint':
+                    db.harvest_state.replace_one({"channel_id": value['channel_id']}, value, upsert=True)
+                    if self.journal is not None:
+                        self.journal.put(f"channel:{channel_name}", True)
+                    print(f"Channel '{channel_name}' harvested and stored.")
+                    continue
+                if key not in STREAMED_COLLECTIONS or not value:
+                    continue
+
+                collection_name, unique_key = STREAMED_COLLECTIONS[key]
+                documents = value if isinstance(value, list) else [value]
+                # One normalized batch feeds both databases
+                frame = self._normalize(documents)
+                with self.metrics.stage('mongo_write'):
+                    counts = self.bulk_upsert(db[collection_name], normalized_documents(frame, documents), unique_key,
+                                              upsert=key != 'video_statistics')
+                self.metrics.add_rows('mongo_write', len(documents))
+                for name, count in counts.items():
+                    mongo_counts[collection_name][name] += count
+
+                if key == 'video_statistics':
+                    with self.metrics.stage('mysql_import'):
+                        self._update_mysql_statistics(frame)
+                else:
+                    rows = normalized_rows(frame, MYSQL_TABLE_COLUMNS[collection_name])
+                    self._write_mysql_rows(collection_name, rows, method, existence_index, mysql_stats)
+
+            if self.journal is not None and not interrupted.is_set():
+                self.journal.complete()
+        except (mysql_connector.Error, pymongo.errors.PyMongoError) as e:
+            print(f"Error streaming data to the databases: {e}")
         finally:
-            if 'self.mysql_connection' in locals() and self.mysql_connection.is_connected():
-                self.mysql_cursor.close()
-                self.mysql_connection.close()
-                print("MySQL connection closed successfully.")
+            stop.set()
+            if producer.is_alive():
+                producer.join()
+            self._close_mysql()
+        return {'mongodb': mongo_counts, 'mysql': mysql_stats}
 
-    def select_and_execute_queries(self, host, user, password, database):
+    def select_and_execute_queries(self, host, user, password, database, result_cache=None):
         """
             Selects and executes SQL queries based on user selection and
              displays results using Streamlit.
 
+            Results are served from result_cache while the warehouse data version is
+            unchanged, so reruns do not query MySQL again until new rows are loaded.
+
             Args:
                 host (str): The MySQL host.
                 user (str): The MySQL user.
                 password (str): The MySQL password.
                 database (str): The name of the MySQL database.
+                result_cache (QueryResultCache): Cache of query results, or None.
 
             Returns:
                 None
@@ -742,10 +4044,9 @@ class YouTubeChannelAnalyzer:
             INNER JOIN videos b ON a.channel_id=b.channel_id;
             """,
             "2. Which channels have the most number of videos, and how many videos do they have?": """
-            SELECT channel_name, video_count 
-            FROM channels 
-            WHERE video_count IN (SELECT MAX(video_count) 
-            FROM channels);
+            SELECT channel_name, video_count
+            FROM channels
+            WHERE video_count = (SELECT MAX(video_count) FROM channels);
             """,
             "3. What are the top 10 most viewed videos and their respective channels?": """
             SELECT a.channel_name, b.title ,b.view_count
@@ -788,12 +4089,12 @@ class YouTubeChannelAnalyzer:
             SELECT a.channel_name, b. title ,DATE(b.published_at)
             FROM channels a
             INNER JOIN videos b ON a.channel_id = b.channel_id
-            WHERE YEAR(published_at) = 2022;
+            WHERE b.published_at >= '2022-01-01' AND b.published_at < '2023-01-01';
             """,
             """
             9. What is the average duration of all videos in each channel & what are their corresponding channel names?
             """: """
-            SELECT a.channel_name, AVG(TIME_TO_SEC(duration)) / 60 AS avg_duration_minutes
+            SELECT a.channel_name, AVG(b.duration_seconds) / 60 AS avg_duration_minutes
             FROM channels a
             INNER JOIN videos b ON a.channel_id = b.channel_id
             GROUP BY a.channel_name
@@ -806,53 +4107,194 @@ class YouTubeChannelAnalyzer:
             ORDER BY comment_count DESC
             LIMIT 10;
             """,
-            "11. To view CHANNELS TABLE": """
-            SELECT * FROM channels;
-            """,
-            "12. To view VIDEOS TABLE": """
-            SELECT * FROM videos;
-            """,
-            "13. To view PLAYLISTS TABLE": """
-            SELECT * FROM playlists;
-            """,
-            "14. To view COMMENTS TABLE": """
-            SELECT * FROM comments;
-            """,
+        }
+        # Full tables are browsed page by page instead of loaded at once
+        table_views = {
+            "11. To view CHANNELS TABLE": 'channels',
+            "12. To view VIDEOS TABLE": 'videos',
+            "13. To view PLAYLISTS TABLE": 'playlists',
+            "14. To view COMMENTS TABLE": 'comments',
         }
 
         # Allow user to select queries
-        selected_queries = st.multiselect("Select queries:", list(queries.keys()))
+        selected_queries = st.multiselect("Select queries:", list(queries.keys()) + list(table_views.keys()))
 
         try:
-            self.mysql_connection = mysql.connector.connect(
-                host=host,
-                user=user,
-                password=password,
-                database=database
-            )
+            self.mysql_connection = connect_mysql(host, user, password, database)
 
             self.mysql_cursor = self.mysql_connection.cursor()
+            warehouse = f"{host}/{database}"
+            version = self._warehouse_version() if result_cache is not None and selected_queries else None
 
             # Execute selected queries and display results
             for query_title in selected_queries:
+                if query_title in table_views:
+                    self.view_table(table_views[query_title], query_title)
+                    continue
                 query = queries[query_title]
-                self.mysql_cursor.execute(query)
-                result = self.mysql_cursor.fetchall()
+                df = result_cache.get(warehouse, query, version) if result_cache is not None else None
+                if df is None:
+                    with self.metrics.stage('query'):
+                        self.mysql_cursor.execute(query)
+                        result = self.mysql_cursor.fetchall()
+                    self.metrics.add_rows('query', len(result))
+                    df = pd.DataFrame(result, columns=[i[0] for i in self.mysql_cursor.description])
+                    if result_cache is not None:
+                        result_cache.put(warehouse, query, version, df)
+                else:
+                    self.metrics.increment('query_cache_hits')
 
-                if result:
+                if not df.empty:
                     st.subheader(query_title)
-                    df = pd.DataFrame(result, columns=[i[0] for i in self.mysql_cursor.description])
                     st.dataframe(df)
                 else:
                     st.write("No results found for query:", query_title)
 
-        except mysql.connector.Error as error:
+        except mysql_connector.Error as error:
             st.error(f"Error occurred: {error}")
 
         finally:
-            if 'self.mysql_connection' in locals() and self.mysql_connection.is_connected():
-                self.mysql_cursor.close()
-                self.mysql_connection.close()
+            self._close_mysql()
+
+    @staticmethod
+    def _keyset_condition(sort_column, key, after, descending):
+        """
+            Returns the WHERE condition and parameters selecting the rows that follow
+            after = (sort value, primary key) in ORDER BY sort_column, key. MySQL sorts
+            NULLs first, so they open ascending pages and close descending ones.
+                """
+        sort_value, key_value = after
+        comparison = '<' if descending else '>'
+        if sort_column == key:
+            return f"{key} {comparison} %s", [key_value]
+        if sort_value is None:
+            if descending:
+                return f"({sort_column} IS NULL AND {key} < %s)", [key_value]
+            return f"(({sort_column} IS NULL AND {key} > %s) OR {sort_column} IS NOT NULL)", [key_value]
+        condition = (f"({sort_column} {comparison} %s OR ({sort_column} = %s AND {key} {comparison} %s)"
+                     + (f" OR {sort_column} IS NULL)" if descending else ")"))
+        return condition, [sort_value, sort_value, key_value]
+
+    @staticmethod
+    def _typed_frame(table, rows):
+        """
+            Builds a DataFrame of table rows with nullable integer counters and datetime columns.
+                """
+        columns = MYSQL_TABLE_COLUMNS[table]
+        frame = pd.DataFrame.from_records(rows, columns=columns)
+        for column in columns:
+            if column in MYSQL_COUNTER_COLUMNS or column == 'duration_seconds':
+                frame[column] = pd.to_numeric(frame[column], errors='coerce').astype('Int64')
+            elif column in MYSQL_DATETIME_COLUMNS:
+                frame[column] = pd.to_datetime(frame[column], errors='coerce')
+        return frame
+
+    def fetch_table_page(self, table, sort_column=None, descending=False, after=None, filters=(),
+                         page_size=TABLE_VIEW_PAGE_SIZES[0]):
+        """
+            Fetches one page of a MySQL table with keyset pagination.
+
+            Pages are selected with a WHERE condition on the last (sort value, primary
+            key) pair instead of OFFSET, and read from the cursor in chunks, so memory
+            and latency stay flat however deep the page or large the table.
+
+            Args:
+                table (str): One of the warehouse tables.
+                sort_column (str): The column to sort by; defaults to the primary key.
+                descending (bool): Whether to sort in descending order.
+                after (tuple): The keyset of the previous page's last row, or None.
+                filters (list): (column, operator, value) filters applied by MySQL, with
+                    operators from TABLE_VIEW_FILTER_OPERATORS.
+                page_size (int): The number of rows per page.
+
+            Returns:
+                tuple: The page as a DataFrame, and the keyset of the next page or None
+                    on the last page.
+                    """
+        columns = MYSQL_TABLE_COLUMNS[table]
+        key = columns[0]
+        sort_column = sort_column or key
+        if sort_column not in columns:
+            raise ValueError(f"Unknown column of {table}: {sort_column}")
+
+        conditions = []
+        params = []
+        for column, operator, value in filters:
+            if column not in columns or operator not in TABLE_VIEW_FILTER_OPERATORS:
+                raise ValueError(f"Unsupported filter on {table}: {column} {operator}")
+            conditions.append(TABLE_VIEW_FILTER_OPERATORS[operator].format(column=column))
+            params.append(f"%{value}%" if operator == 'contains' else value)
+        if after is not None:
+            condition, condition_params = self._keyset_condition(sort_column, key, after, descending)
+            conditions.append(condition)
+            params.extend(condition_params)
+
+        direction = 'DESC' if descending else 'ASC'
+        order_by = f"{key} {direction}" if sort_column == key else f"{sort_column} {direction}, {key} {direction}"
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        # One extra row tells whether a next page exists
+        query = f"SELECT {', '.join(columns)} FROM {table} {where} ORDER BY {order_by} LIMIT %s"
+        params.append(page_size + 1)
+
+        rows = []
+        with self.metrics.stage('query'):
+            self.mysql_cursor.execute(query, params)
+            while True:
+                chunk = self.mysql_cursor.fetchmany(TABLE_VIEW_FETCH_SIZE)
+                if not chunk:
+                    break
+                rows.extend(chunk)
+        self.metrics.add_rows('query', len(rows))
+
+        next_after = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last_row = rows[-1]
+            next_after = (last_row[columns.index(sort_column)], last_row[0])
+        return self._typed_frame(table, rows), next_after
+
+    def view_table(self, table, title):
+        """
+            Displays a MySQL table page by page with server-side sort and filter controls.
+
+            The keysets of the pages visited are kept in the session state, so Previous
+            and Next move between pages without re-reading earlier ones.
+                """
+        columns = MYSQL_TABLE_COLUMNS[table]
+        st.subheader(title)
+        controls = st.columns(6)
+        sort_column = controls[0].selectbox("Sort by", (columns[0],) + TABLE_VIEW_SORT_COLUMNS[table],
+                                            key=f"{table}_sort_column")
+        descending = controls[1].selectbox("Order", ("Ascending", "Descending"),
+                                           key=f"{table}_order") == "Descending"
+        filter_column = controls[2].selectbox("Filter by", ("",) + columns, key=f"{table}_filter_column")
+        filter_operator = controls[3].selectbox("Operator", list(TABLE_VIEW_FILTER_OPERATORS),
+                                                key=f"{table}_filter_operator")
+        filter_value = controls[4].text_input("Value", key=f"{table}_filter_value")
+        page_size = controls[5].selectbox("Rows per page", TABLE_VIEW_PAGE_SIZES, key=f"{table}_page_size")
+        filters = [(filter_column, filter_operator, filter_value)] if filter_column and filter_value else []
+
+        # Start over from the first page whenever the sort or filter changes
+        signature = (sort_column, descending, filter_column, filter_operator, filter_value, page_size)
+        if st.session_state.get(f"{table}_signature") != signature:
+            st.session_state[f"{table}_signature"] = signature
+            st.session_state[f"{table}_pages"] = [None]
+            st.session_state[f"{table}_next"] = None
+        pages = st.session_state[f"{table}_pages"]
+
+        navigation = st.columns(3)
+        if navigation[0].button("Previous", key=f"{table}_previous") and len(pages) > 1:
+            pages.pop()
+        if navigation[1].button("Next", key=f"{table}_next_page") and st.session_state[f"{table}_next"]:
+            pages.append(st.session_state[f"{table}_next"])
+
+        page, next_after = self.fetch_table_page(table, sort_column, descending, pages[-1], filters, page_size)
+        st.session_state[f"{table}_next"] = next_after
+        navigation[2].write(f"Page {len(pages)}" + ("" if next_after else " (last)"))
+        if page.empty:
+            st.write("No rows found in", table)
+        else:
+            st.dataframe(page)
 
     def main(self):
         """
@@ -877,8 +4319,8 @@ class YouTubeChannelAnalyzer:
         st.sidebar.title("YouTube API Connection")
 
         # User inputs
-        api_key = st.sidebar.text_input("Enter your YouTube Data API key:",
-                                        placeholder="Enter your YouTube Data API key here",
+        api_key = st.sidebar.text_input("Enter your YouTube Data API key(s):",
+                                        placeholder="One key, or several keys separated by commas",
                                         type="password")
 
         st.sidebar.title("MongoDB Atlas Database Connection")
@@ -907,32 +4349,97 @@ class YouTubeChannelAnalyzer:
         # Input fields for channel names
         channel_names = []
         for i in range(num_channels):
-            channel_name = st.text_input(f"Enter channel name {i + 1}:")
+            channel_name = st.text_input(f"Enter channel name, @handle or channel ID {i + 1}:")
             channel_names.append(channel_name)
 
+        max_workers = st.number_input("Number of concurrent workers:",
+                                      min_value=1, max_value=32, value=1, step=1)
+        daily_quota = st.number_input("YouTube API quota budget per key for this run (units):",
+                                      min_value=1, value=DEFAULT_DAILY_QUOTA, step=100,
+                                      help="Spend is counted from zero on every run. Lower it to leave "
+                                           "room for other runs against the same daily quota.")
+        comment_limit = st.number_input("Maximum comments per video (0 for unlimited):",
+                                        min_value=0, value=100, step=50)
+        comment_order = st.selectbox("Comment order:", ["relevance", "time"])
+        expand_replies = st.checkbox("Include comment replies", value=False)
+        use_response_cache = st.checkbox("Reuse cached YouTube API responses", value=True)
+        incremental = st.checkbox("Only fetch changes of channels already in MongoDB", value=False)
+        resume_harvest = st.checkbox("Resume interrupted harvests from the job journal", value=True)
+        stream_to_databases = st.checkbox("Write records to the databases while harvesting", value=False)
+        comment_partitions = st.number_input("Partitions of the MySQL comments table (0 for none):",
+                                             min_value=0, max_value=1024, value=0, step=1)
+
         if st.button("Analyze Channels"):
 
             # Authenticate with API key
-            self.authenticate(api_key)
+            if use_response_cache:
+                self.enable_response_cache()
+            self.enable_channel_cache()
+            if resume_harvest:
+                self.enable_journal()
+            self.authenticate(api_key, daily_budget_per_key=daily_quota)
+            self.configure_comments(comment_limit, comment_order, expand_replies)
+            self.metrics = HarvestMetrics()
+            self.scheduler = RequestScheduler(daily_budget=daily_quota * len(self.key_pool), metrics=self.metrics)
+
+            checkpoints = None
+            if incremental:
+                # Resolved ids are kept, so the harvest does not resolve the channels again
+                try:
+                    channel_ids = [channel_id for channel_id in self.resolve_channel_ids(channel_names).values()
+                                   if channel_id]
+                except QuotaBudgetExceeded as e:
+                    print(f"Could not resolve the channels: {e}")
+                    channel_ids = []
+                checkpoints = self.load_harvest_checkpoints(mongodb_uri, mongodb_db_name, channel_ids)
+
+            if stream_to_databases:
+                # Create database and tables in AWS MySQL before records start flowing in
+                self.create_mysql_database(mysql_host, mysql_user, mysql_password, mysql_database)
+                self.create_mysql_tables(mysql_host, mysql_user, mysql_password, mysql_database,
+                                         comment_partitions=comment_partitions)
+
+                # Write records to MongoDB Atlas and AWS MySQL while harvesting
+                self.stream_channels_to_databases(channel_names, mongodb_uri, mongodb_db_name, mysql_host,
+                                                  mysql_user, mysql_password, mysql_database,
+                                                  max_workers=max_workers, checkpoints=checkpoints)
+            else:
+                self.write_failed = False
+                output = self.analyze_channels(channel_names, max_workers=max_workers, checkpoints=checkpoints)
+
+                # Insert data into MongoDB Atlas
+                self.insert_data_to_mongodb(output, mongodb_uri, mongodb_db_name)
+
+                # create database in AWS MySQL
+                self.create_mysql_database(mysql_host, mysql_user, mysql_password, mysql_database)
 
-            output = self.analyze_channels(channel_names)
+                # Create tables in AWS MySQL
+                self.create_mysql_tables(mysql_host, mysql_user, mysql_password, mysql_database,
+                                         comment_partitions=comment_partitions)
 
-            # Insert data into MongoDB Atlas
-            self.insert_data_to_mongodb(output, mongodb_uri, mongodb_db_name)
+                # Import data from MongoDB to AWS MySQL
+                self.import_data_to_mysql(mongodb_uri, mongodb_db_name, mysql_host,
+                                          mysql_user, mysql_password, mysql_database)
 
-            # create database in AWS MySQL
-            self.create_mysql_database(mysql_host, mysql_user, mysql_password, mysql_database)
+                # Only a harvest stored in both databases is done; otherwise the next run resumes it
+                self.complete_journal_job(output)
 
-            # Create tables in AWS MySQL
-            self.create_mysql_tables(mysql_host, mysql_user, mysql_password, mysql_database)
+            st.write(f"YouTube API quota used by this run: {self.scheduler.quota_used} of "
+                     f"{self.scheduler.daily_budget} units.")
+            st.table(pd.DataFrame(self.key_pool.summary()))
 
-            # Import data from MongoDB to AWS MySQL
-            self.import_data_to_mysql(mongodb_uri, mongodb_db_name, mysql_host,
-                                      mysql_user, mysql_password, mysql_database)
+            # Metrics of this run, also exported for dashboards and scrapers
+            self.metrics.render_streamlit()
+            self.metrics.export_json(METRICS_JSON_PATH)
+            self.metrics.export_prometheus(METRICS_PROMETHEUS_PATH)
 
             # Select queries section
         st.sidebar.title("Select Queries")
-        self.select_and_execute_queries(mysql_host, mysql_user, mysql_password, mysql_database)
+        result_cache = None
+        if st.sidebar.checkbox("Cache query results until new data is loaded", value=True):
+            spill = st.sidebar.checkbox("Spill cached results to disk", value=False)
+            result_cache = get_query_result_cache(QUERY_CACHE_MAX_BYTES, QUERY_CACHE_SPILL_DIR if spill else None)
+        self.select_and_execute_queries(mysql_host, mysql_user, mysql_password, mysql_database, result_cache)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,576 @@
+import gc
+import json
+import time
+import random
+import argparse
+import functools
+import threading
+import tracemalloc
+from datetime import datetime, timedelta
+import httplib2
+import mysql.connector
+from googleapiclient.errors import HttpError
+
+import app
+from app import YouTubeChannelAnalyzer, HarvestMetrics, RequestScheduler, MYSQL_TABLE_COLUMNS, QUOTA_COSTS, \
+    DEFAULT_QUOTA_COST
+
+# Record counts benchmarked by default, from a quick smoke run to a full warehouse
+DEFAULT_SCALES = (100, 1000, 10000, 100000, 1000000)
+# Publication time of the newest synthetic video; older videos are one hour apart
+SYNTHETIC_EPOCH = datetime(2024, 1, 1)
+
+
+class SyntheticChannels:
+    """
+        Deterministic synthetic YouTube data: channels with playlists, videos,
+        comment threads and replies, generated on demand from their ids.
+            """
+
+    def __init__(self, channels, playlists, videos, comments, replies=0):
+        """
+            Initializes the shape of every synthetic channel.
+
+            Args:
+                channels (int): The number of channels.
+                playlists (int): Playlists per channel besides the uploads playlist.
+                videos (int): Videos per channel.
+                comments (int): Comment threads per video.
+                replies (int): Replies per comment thread.
+                    """
+        self.channels = channels
+        self.playlists = playlists
+        self.videos = videos
+        self.comments = comments
+        self.replies = replies
+
+    @classmethod
+    def for_scale(cls, records, channels=1, playlists=10, comments=20, replies=0):
+        """
+            Sizes the videos per channel so a harvest yields about records records.
+                """
+        per_video = 1 + comments * (1 + replies)
+        videos = max(1, (records - channels * (1 + playlists)) // (channels * per_video))
+        return cls(channels, playlists, videos, comments, replies)
+
+    @property
+    def records(self):
+        """
+            The number of channel, playlist, video and comment records of a full harvest.
+                """
+        per_video = 1 + self.comments * (1 + self.replies)
+        return self.channels * (1 + self.playlists + self.videos * per_video)
+
+    def channel_names(self):
+        return [f"bench-channel-{channel}" for channel in range(self.channels)]
+
+    @staticmethod
+    def channel_id(channel):
+        return f"UCbench{channel:017d}"
+
+    @staticmethod
+    def video_id(channel, video):
+        return f"v{channel:03d}{video:07d}"
+
+    @staticmethod
+    def _parse_video_id(video_id):
+        return int(video_id[1:4]), int(video_id[4:])
+
+    @staticmethod
+    def _timestamp(hours_ago):
+        return (SYNTHETIC_EPOCH - timedelta(hours=hours_ago)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    @staticmethod
+    def _page(items_for, total, params, page_size):
+        """
+            Returns the page of a list response selected by pageToken.
+                """
+        start = int(params.get('pageToken') or 0)
+        size = min(int(params.get('maxResults') or page_size), page_size)
+        page = {'items': [items_for(index) for index in range(start, min(total, start + size))]}
+        if start + size < total:
+            page['nextPageToken'] = str(start + size)
+        return page
+
+    @staticmethod
+    def _thumbnails(url):
+        # The API returns every size, though only the default one is stored
+        sizes = (('default', 120, 90), ('medium', 320, 180), ('high', 480, 360), ('standard', 640, 480),
+                 ('maxres', 1280, 720))
+        return {name: {'url': f"{url}/{name}.jpg", 'width': width, 'height': height}
+                for name, width, height in sizes}
+
+    def _comment(self, comment_id, hours_ago):
+        # Carries the fields of a real comment resource, most of which are not stored
+        text = f"Synthetic comment {comment_id}"
+        published_at = self._timestamp(hours_ago)
+        return {
+            'kind': 'youtube#comment',
+            'etag': f"etag-{comment_id}",
+            'id': comment_id,
+            'snippet': {
+                'authorDisplayName': f"Viewer {comment_id[-4:]}",
+                'authorProfileImageUrl': f"https://yt3.ggpht.com/ytc/{comment_id}=s48-c-k-c0x00ffffff-no-rj",
+                'authorChannelUrl': f"http://www.youtube.com/channel/UCviewer{comment_id[-8:]}",
+                'authorChannelId': {'value': f"UCviewer{comment_id[-8:]}"},
+                'textDisplay': text,
+                'textOriginal': text,
+                'canRate': True,
+                'viewerRating': 'none',
+                'likeCount': len(comment_id),
+                'publishedAt': published_at,
+                'updatedAt': published_at
+            }
+        }
+
+    def search_list(self, params):
+        if params.get('type') == 'channel':
+            name = params.get('q', '')
+            if not name.startswith('bench-channel-'):
+                return {'items': []}
+            return {'items': [{'id': {'channelId': self.channel_id(int(name.rsplit('-', 1)[1]))}}]}
+        channel = int(params['channelId'][7:])
+        return self._page(lambda video: {'id': {'videoId': self.video_id(channel, video)}}, self.videos, params, 50)
+
+    def channels_list(self, params):
+        items = []
+        for channel_id in params.get('id', '').split(','):
+            if not channel_id.startswith('UCbench'):
+                continue
+            channel = int(channel_id[7:])
+            items.append({
+                'id': channel_id,
+                'snippet': {'title': f"Bench Channel {channel}", 'description': "Synthetic channel",
+                            'publishedAt': self._timestamp(24 * 365 * 5)},
+                'statistics': {'videoCount': str(self.videos), 'viewCount': str(self.videos * 1000),
+                               'subscriberCount': str(self.videos * 10), 'hiddenSubscriberCount': False},
+                'status': {'privacyStatus': 'public'},
+                'contentDetails': {'relatedPlaylists': {'uploads': 'UU' + channel_id[2:]}}
+            })
+        return {'items': items}
+
+    def playlists_list(self, params):
+        channel = int(params['channelId'][7:])
+        return self._page(lambda playlist: {
+            'id': f"PLbench{channel:03d}{playlist:04d}",
+            'etag': f"etag-{channel}-{playlist}-{self.videos}",
+            'snippet': {'title': f"Playlist {playlist}"}
+        }, self.playlists, params, 50)
+
+    def playlist_items_list(self, params):
+        playlist_id = params['playlistId']
+        channel = int(playlist_id[7:10]) if playlist_id.startswith('PL') else int(playlist_id[7:])
+        if playlist_id.startswith('UU'):
+            videos = list(range(self.videos))
+        else:
+            # Every video belongs to one playlist besides the uploads playlist
+            playlist = int(playlist_id[10:])
+            videos = list(range(playlist, self.videos, self.playlists))
+        return self._page(lambda index: {
+            'contentDetails': {'videoId': self.video_id(channel, videos[index]),
+                               'videoPublishedAt': self._timestamp(videos[index])}
+        }, len(videos), params, 50)
+
+    def videos_list(self, params):
+        items = []
+        for video_id in params['id'].split(','):
+            channel, video = self._parse_video_id(video_id)
+            if channel >= self.channels or video >= self.videos:
+                continue
+            items.append({
+                'id': video_id,
+                'kind': 'youtube#video',
+                'etag': f"etag-{video_id}",
+                'snippet': {'title': f"Synthetic video {video}", 'description': "Synthetic description " * 8,
+                            'publishedAt': self._timestamp(video),
+                            'channelId': self.channel_id(channel), 'channelTitle': f"Bench Channel {channel}",
+                            'thumbnails': self._thumbnails(f"https://i.ytimg.com/vi/{video_id}"),
+                            'tags': [f"tag{tag}" for tag in range(10)], 'categoryId': '22',
+                            'liveBroadcastContent': 'none', 'defaultAudioLanguage': 'en',
+                            'localized': {'title': f"Synthetic video {video}",
+                                          'description': "Synthetic description " * 8}},
+                'statistics': {'viewCount': str(video * 7 + 100), 'likeCount': str(video + 10),
+                               'commentCount': str(self.comments * (1 + self.replies)), 'favoriteCount': '0'},
+                'contentDetails': {'duration': f"PT{video % 60}M{video % 59}S", 'dimension': '2d',
+                                   'definition': 'hd', 'caption': 'false', 'licensedContent': True,
+                                   'contentRating': {}, 'projection': 'rectangular'}
+            })
+        return {'items': items}
+
+    def comment_threads_list(self, params):
+        video_id = params['videoId']
+        channel, video = self._parse_video_id(video_id)
+        inline = self.replies <= 5
+
+        def thread(index):
+            thread_id = f"Ug{video_id}{index:06d}"
+            item = {
+                'kind': 'youtube#commentThread',
+                'etag': f"etag-{thread_id}",
+                'id': thread_id,
+                'snippet': {'channelId': self.channel_id(channel), 'videoId': video_id,
+                            'topLevelComment': self._comment(thread_id, video - index / 1000.0),
+                            'canReply': True, 'totalReplyCount': self.replies, 'isPublic': True}
+            }
+            if inline and self.replies and 'replies' in params.get('part', ''):
+                item['replies'] = {'comments': [self._comment(f"{thread_id}.r{reply:03d}", video - index / 1000.0)
+                                                for reply in range(self.replies)]}
+            return item
+
+        return self._page(thread, self.comments, params, 100)
+
+    def comments_list(self, params):
+        parent_id = params['parentId']
+        return self._page(lambda reply: self._comment(f"{parent_id}.r{reply:03d}", 0), self.replies, params, 100)
+
+
+@functools.lru_cache(maxsize=None)
+def parse_fields(fields):
+    """
+        Parses a partial response mask such as 'nextPageToken,items(id,snippet/title)'
+        into a tree of selected keys, None selecting a whole value.
+            """
+    def parse_list(position):
+        tree = {}
+        while position < len(fields):
+            end = position
+            while end < len(fields) and fields[end] not in ',()':
+                end += 1
+            path = fields[position:end].strip().split('/')
+            position = end
+            subtree = None
+            if position < len(fields) and fields[position] == '(':
+                subtree, position = parse_list(position + 1)
+                position += 1
+            node = tree
+            for name in path[:-1]:
+                if name in node and node[name] is None:
+                    break
+                node = node.setdefault(name, {})
+            else:
+                if subtree is None or node.get(path[-1], {}) is None:
+                    node[path[-1]] = None
+                else:
+                    node.setdefault(path[-1], {}).update(subtree)
+            if position < len(fields) and fields[position] == ')':
+                return tree, position
+            position += 1
+        return tree, position
+
+    return parse_list(0)[0]
+
+
+def apply_fields(value, tree):
+    """
+        Keeps the parts of a response selected by a parse_fields tree; like the API,
+        empty objects and lists are left out.
+            """
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [item for item in (apply_fields(item, tree) for item in value) if item not in ({}, [])]
+    if isinstance(value, dict):
+        selected = {key: apply_fields(value[key], subtree) for key, subtree in tree.items() if key in value}
+        return {key: item for key, item in selected.items() if item not in ({}, [])}
+    return value
+
+
+class FakeRequest:
+    """
+        Stand-in for a googleapiclient HttpRequest: execute() serializes the synthetic
+        response to JSON and decodes it through postproc, like the real client.
+            """
+
+    def __init__(self, service, api_key, endpoint, params):
+        self.service = service
+        self.api_key = api_key
+        self.endpoint = endpoint
+        self.params = params
+        self.postproc = lambda resp, content: json.loads(content)
+
+    def execute(self):
+        self.service.before_call(self.api_key, self.endpoint)
+        resource, method = self.endpoint.split('.')
+        handler = getattr(self.service.data, f"{resource}_{method}".replace('playlistItems', 'playlist_items')
+                          .replace('commentThreads', 'comment_threads'))
+        response = handler(self.params)
+        if self.params.get('fields'):
+            response = apply_fields(response, parse_fields(self.params['fields']))
+        content = json.dumps(response).encode('utf-8')
+        return self.postproc(httplib2.Response({'status': 200}), content)
+
+
+class FakeResource:
+    def __init__(self, service, api_key, resource):
+        self.service = service
+        self.api_key = api_key
+        self.resource = resource
+
+    def list(self, **params):
+        return FakeRequest(self.service, self.api_key, f"{self.resource}.list", params)
+
+
+class FakeYouTubeService:
+    """
+        Local stand-in for the youtube v3 discovery client, serving SyntheticChannels
+        with simulated latency, transient rate limit errors and per-key daily quotas.
+            """
+
+    def __init__(self, data, latency=0.0, error_rate=0.0, quota_per_key=None, seed=0):
+        """
+            Initializes the fake API.
+
+            Args:
+                data (SyntheticChannels): The channels served.
+                latency (float): Mean seconds slept per call, with +/-50% uniform jitter.
+                error_rate (float): Probability of a retryable 403 rateLimitExceeded per call.
+                quota_per_key (int): Quota units after which a key gets 403 quotaExceeded.
+                seed (int): Seed of the latency and error generator.
+                    """
+        self.data = data
+        self.latency = latency
+        self.error_rate = error_rate
+        self.quota_per_key = quota_per_key
+        self.quota_used = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def client(self, api_key):
+        """
+            Returns a client object for api_key exposing the resources the analyzer calls.
+                """
+        service = self
+
+        class Client:
+            def __getattr__(self, resource):
+                return lambda: FakeResource(service, api_key, resource)
+
+        return Client()
+
+    def _error(self, reason):
+        content = json.dumps({'error': {'code': 403, 'message': reason,
+                                        'errors': [{'reason': reason, 'domain': 'youtube.quota'}]}})
+        return HttpError(httplib2.Response({'status': 403}), content.encode('utf-8'))
+
+    def before_call(self, api_key, endpoint):
+        with self._lock:
+            delay = self._random.uniform(0.5, 1.5) * self.latency if self.latency else 0.0
+            failed = self.error_rate and self._random.random() < self.error_rate
+            cost = QUOTA_COSTS.get(endpoint, DEFAULT_QUOTA_COST)
+            exhausted = (self.quota_per_key is not None
+                         and self.quota_used.get(api_key, 0) + cost > self.quota_per_key)
+            if not exhausted and not failed:
+                self.quota_used[api_key] = self.quota_used.get(api_key, 0) + cost
+        if delay:
+            time.sleep(delay)
+        if exhausted:
+            raise self._error('quotaExceeded')
+        if failed:
+            raise self._error('rateLimitExceeded')
+
+
+class BenchmarkAnalyzer(YouTubeChannelAnalyzer):
+    """
+        YouTubeChannelAnalyzer whose API clients are served by a FakeYouTubeService.
+            """
+
+    def __init__(self, service):
+        super().__init__()
+        self.service = service
+
+    def _build_client(self, api_key):
+        return self.service.client(api_key)
+
+
+class StageTimer:
+    """
+        Measures wall time and peak Python heap allocation of a benchmark stage.
+            """
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.seconds = 0.0
+        self.peak_bytes = None
+
+    def __enter__(self):
+        gc.collect()
+        if self.trace_memory:
+            tracemalloc.start()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.seconds = time.perf_counter() - self._started
+        if self.trace_memory:
+            self.peak_bytes = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+
+def use_mongomock():
+    """
+        Routes the analyzer's MongoDB connections to one shared in-process mongomock client.
+            """
+    try:
+        import mongomock
+    except ImportError:
+        raise SystemExit("--mongomock needs the mongomock package: pip install mongomock")
+    client = mongomock.MongoClient()
+    app.pymongo.MongoClient = lambda *args, **kwargs: client
+
+
+def reset_databases(args, mongodb_db_name):
+    """
+        Drops the benchmark MongoDB database and MySQL tables so every scale starts empty.
+            """
+    # Through app's pymongo handle, which use_mongomock patches
+    app.pymongo.MongoClient(args.mongo_uri).drop_database(mongodb_db_name)
+    if args.skip_mysql:
+        return
+    YouTubeChannelAnalyzer.create_mysql_database(args.mysql_host, args.mysql_user, args.mysql_password,
+                                                 args.mysql_database)
+    connection = mysql.connector.connect(host=args.mysql_host, user=args.mysql_user,
+                                         password=args.mysql_password, database=args.mysql_database)
+    cursor = connection.cursor()
+    # Dropping the migration history too makes create_mysql_tables rebuild the latest schema
+    for table in list(reversed(list(MYSQL_TABLE_COLUMNS))) + ['schema_migrations', 'warehouse_version']:
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    connection.commit()
+    cursor.close()
+    connection.close()
+    YouTubeChannelAnalyzer.create_mysql_tables(args.mysql_host, args.mysql_user, args.mysql_password,
+                                               args.mysql_database)
+
+
+def count_records(output):
+    records = 0
+    for data in output.values():
+        if isinstance(data, dict):
+            records += 1 + len(data.get('playlist_ids') or []) + len(data.get('video_details') or [])
+            records += len(data['video_comments']) if isinstance(data.get('video_comments'), list) else 0
+    return records
+
+
+def run_scale(args, scale):
+    """
+        Harvests a synthetic warehouse of about scale records and loads it into
+        MongoDB and MySQL, timing every stage.
+
+        Returns:
+            dict: Seconds, records, throughput and peak memory per stage.
+                """
+    data = SyntheticChannels.for_scale(scale, args.channels, args.playlists, args.comments, args.replies)
+    service = FakeYouTubeService(data, args.latency, args.error_rate, args.quota_per_key, args.seed)
+    analyzer = BenchmarkAnalyzer(service)
+    api_keys = [f"bench-key-{index:04d}" for index in range(args.keys)]
+    analyzer.authenticate(api_keys, daily_budget_per_key=args.budget_per_key)
+    analyzer.metrics = HarvestMetrics()
+    analyzer.scheduler = RequestScheduler(daily_budget=args.budget_per_key * args.keys,
+                                          requests_per_second=args.requests_per_second,
+                                          burst=max(1, int(args.requests_per_second)),
+                                          backoff_base=args.backoff_base, metrics=analyzer.metrics)
+    analyzer.configure_comments(data.comments, expand_replies=data.replies > 0)
+    analyzer.use_field_masks = args.field_masks
+
+    mongodb_db_name = f"{args.mongo_db}_{scale}"
+    reset_databases(args, mongodb_db_name)
+    result = {'scale': scale, 'records': data.records, 'videos_per_channel': data.videos, 'stages': {}}
+
+    def record(stage, timer, records):
+        result['stages'][stage] = {
+            'seconds': timer.seconds,
+            'records': records,
+            'records_per_second': records / timer.seconds if timer.seconds else 0.0,
+            'peak_memory_mb': timer.peak_bytes / 1e6 if timer.peak_bytes is not None else None
+        }
+
+    with StageTimer(args.trace_memory) as timer:
+        output = analyzer.analyze_channels(data.channel_names(), max_workers=args.workers)
+    records = count_records(output)
+    record('analyze_channels', timer, records)
+
+    with StageTimer(args.trace_memory) as timer:
+        analyzer.insert_data_to_mongodb(output, args.mongo_uri, mongodb_db_name)
+    record('insert_data_to_mongodb', timer, records)
+    del output
+
+    if not args.skip_mysql:
+        with StageTimer(args.trace_memory) as timer:
+            stats = analyzer.import_data_to_mysql(args.mongo_uri, mongodb_db_name, args.mysql_host, args.mysql_user,
+                                                  args.mysql_password, args.mysql_database,
+                                                  method=args.mysql_method)
+        record('import_data_to_mysql', timer, sum(table_stats['rows'] for table_stats in stats.values()))
+
+    snapshot = analyzer.metrics.snapshot()
+    result['api'] = {key: snapshot[key] for key in ('api_calls', 'quota_units', 'bytes_received')}
+    result['api']['retries'] = analyzer.scheduler.retries
+    result['api']['parse_seconds'] = sum(entry['parse_seconds'] for entry in snapshot['endpoints'].values())
+    return result
+
+
+def print_report(results):
+    print(f"{'scale':>9} {'stage':<24} {'seconds':>9} {'records':>9} {'records/s':>11} {'peak MB':>9}")
+    for result in results:
+        for stage, stats in result['stages'].items():
+            peak = f"{stats['peak_memory_mb']:.1f}" if stats['peak_memory_mb'] is not None else '-'
+            print(f"{result['scale']:>9} {stage:<24} {stats['seconds']:>9.2f} {stats['records']:>9} "
+                  f"{stats['records_per_second']:>11.0f} {peak:>9}")
+        api = result['api']
+        print(f"{'':>9} {api['api_calls']} API calls, {api['quota_units']} quota units, "
+              f"{api['bytes_received'] / 1e6:.1f} MB received, {api['parse_seconds']:.2f}s parsing, "
+              f"{api['retries']} retries")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark harvesting and loading against a local fake YouTube API.")
+    parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES),
+                        help="Approximate numbers of records to harvest and load.")
+    parser.add_argument('--channels', type=int, default=1)
+    parser.add_argument('--playlists', type=int, default=10, help="Playlists per channel.")
+    parser.add_argument('--comments', type=int, default=20, help="Comment threads per video.")
+    parser.add_argument('--replies', type=int, default=0, help="Replies per comment thread.")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.0, help="Mean simulated API latency in seconds.")
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="Probability of a retryable rateLimitExceeded error per call.")
+    parser.add_argument('--keys', type=int, default=1, help="Number of fake API keys.")
+    parser.add_argument('--quota-per-key', type=int, default=None,
+                        help="Quota units after which the fake API answers quotaExceeded for a key.")
+    parser.add_argument('--budget-per-key', type=int, default=10 ** 9,
+                        help="Quota budget per key enforced by the request scheduler.")
+    parser.add_argument('--requests-per-second', type=float, default=10000.0)
+    parser.add_argument('--backoff-base', type=float, default=0.01)
+    parser.add_argument('--no-field-masks', dest='field_masks', action='store_false',
+                        help="Request whole parts instead of the fields= masks, to measure their savings.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mongo-uri', default="mongodb://localhost:27017")
+    parser.add_argument('--mongo-db', default="youtube_benchmark")
+    parser.add_argument('--mongomock', action='store_true', help="Use an in-process mongomock database.")
+    parser.add_argument('--mysql-host', default="localhost")
+    parser.add_argument('--mysql-user', default="root")
+    parser.add_argument('--mysql-password', default="")
+    parser.add_argument('--mysql-database', default="youtube_benchmark")
+    parser.add_argument('--mysql-method', choices=['executemany', 'load_data'], default='executemany')
+    parser.add_argument('--skip-mysql', action='store_true', help="Only benchmark the harvest and MongoDB.")
+    parser.add_argument('--no-trace-memory', dest='trace_memory', action='store_false',
+                        help="Skip tracemalloc, which slows large runs down, and report no peak memory.")
+    parser.add_argument('--output', help="Write the results as JSON to this file.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.mongomock:
+        use_mongomock()
+    results = []
+    for scale in args.scales:
+        results.append(run_scale(args, scale))
+        print_report(results[-1:])
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(results, output_file, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+# Modules app.py imports only once a stage needs them
+DEFERRED_MODULES = ('pandas', 'pymongo', 'mysql.connector', 'googleapiclient.discovery', 'httplib2', 'httpx')
+# Video requested by the first-request probe
+PROBE_VIDEO_ID = "dQw4w9WgXcQ"
+PHASES = ('import_streamlit', 'import_app', 'load_discovery', 'build_client', 'first_request', 'next_request')
+
+
+def probe(discovery_document, api_key=None):
+    """
+        Measures one cold start of the app in the current, freshly started interpreter.
+
+        Without an API key the requests are answered by googleapiclient's HttpMockSequence,
+        so the network round trip is left out and no quota is spent.
+
+        Args:
+            discovery_document (str): 'bundled' for the trimmed document shipped with the
+                app, 'full' for the document shipped with google-api-python-client.
+            api_key (str): Sends the first requests to the YouTube API with this key.
+
+        Returns:
+            dict: Seconds per startup phase, the deferred modules loaded by importing app
+                and the seconds each deferred module takes once a stage needs it.
+                    """
+    timings = {}
+    started = time.perf_counter()
+    import streamlit  # noqa: F401
+    timings['import_streamlit'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    import app
+    timings['import_app'] = time.perf_counter() - started
+    loaded_by_import = [module for module in DEFERRED_MODULES if module in sys.modules]
+
+    analyzer = app.YouTubeChannelAnalyzer()
+    if discovery_document == 'full':
+        analyzer.discovery_document_path = None
+    started = time.perf_counter()
+    app.get_youtube_discovery_document(analyzer.discovery_document_path)
+    timings['load_discovery'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    analyzer.authenticate(api_key or "startup-benchmark-key")
+    timings['build_client'] = time.perf_counter() - started
+
+    for phase in ('first_request', 'next_request'):
+        started = time.perf_counter()
+        if api_key:
+            analyzer._call("videos.list", part="id", fields="items/id", id=PROBE_VIDEO_ID)
+        else:
+            from googleapiclient.http import HttpMockSequence
+            request = analyzer._collection_for(analyzer.api_key, 'videos').list(part="id", fields="items/id",
+                                                                                id=PROBE_VIDEO_ID)
+            request.execute(http=HttpMockSequence([({'status': '200'}, json.dumps({'items': []}))]))
+        timings[phase] = time.perf_counter() - started
+
+    deferred = {}
+    for module in DEFERRED_MODULES:
+        if module not in sys.modules:
+            started = time.perf_counter()
+            __import__(module)
+            deferred[module] = time.perf_counter() - started
+    return {'timings': timings, 'loaded_by_import': loaded_by_import, 'deferred_imports': deferred}
+
+
+def run_probes(discovery_document, runs, api_key=None):
+    """
+        Runs probe in runs fresh interpreters, so every run pays the full cold start.
+            """
+    command = [sys.executable, os.path.abspath(__file__), '--probe', '--discovery-document', discovery_document]
+    environment = dict(os.environ)
+    if api_key:
+        environment['YOUTUBE_API_KEY'] = api_key
+    results = []
+    for _ in range(runs):
+        completed = subprocess.run(command, capture_output=True, text=True, env=environment,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+        if completed.returncode != 0:
+            raise SystemExit(f"Startup probe failed:\n{completed.stderr}")
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def summarize(discovery_document, results):
+    """
+        Returns the median seconds of every phase and deferred import over the runs.
+            """
+    deferred_modules = results[0]['deferred_imports']
+    return {
+        'discovery_document': discovery_document,
+        'runs': len(results),
+        'phases': {phase: statistics.median(result['timings'][phase] for result in results) for phase in PHASES},
+        'loaded_by_import': results[0]['loaded_by_import'],
+        'deferred_imports': {module: statistics.median(result['deferred_imports'][module] for result in results)
+                             for module in deferred_modules},
+    }
+
+
+def print_report(summaries):
+    print(f"{'phase':<28}" + ''.join(f"{summary['discovery_document'] + ' (ms)':>18}" for summary in summaries))
+    for phase in PHASES:
+        print(f"{phase:<28}" + ''.join(f"{summary['phases'][phase] * 1000:>18.1f}" for summary in summaries))
+    for summary in summaries:
+        loaded = ', '.join(summary['loaded_by_import']) or 'none'
+        print(f"\n{summary['discovery_document']}: deferred modules loaded by importing app: {loaded}")
+        for module, seconds in summary['deferred_imports'].items():
+            print(f"  {module:<28} {seconds * 1000:>8.1f} ms when first needed")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Measure the cold start of app.py: imports, discovery document, client and first request.")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters started per discovery document.")
+    parser.add_argument('--discovery-document', choices=['bundled', 'full'], nargs='+',
+                        default=['bundled', 'full'])
+    parser.add_argument('--api-key', default=None,
+                        help="Send the first requests to the YouTube API (1 quota unit each) instead of a mock.")
+    parser.add_argument('--output', help="Write the results as JSON to this file.")
+    parser.add_argument('--probe', action='store_true', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.probe:
+        print(json.dumps(probe(args.discovery_document[0], os.environ.get('YOUTUBE_API_KEY'))))
+        return None
+    summaries = [summarize(discovery_document, run_probes(discovery_document, args.runs, args.api_key))
+                 for discovery_document in args.discovery_document]
+    print_report(summaries)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(summaries, output_file, indent=2)
+    return summaries
+
+
+if __name__ == "__main__":
+    main()